@@ -0,0 +1,80 @@
+import logging
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+
+def cell_seed(seed: int, experiment_key: str, param_value: float, run_index: int) -> int:
+    # Depends only on the cell, so a run gets the same seed whatever grid or worker it ends up in, and extending a
+    # sweep with more values or runs keeps the seeds (and cached results) of the cells already there
+    cell = zlib.crc32(f"{experiment_key}:{float(param_value)!r}".encode())
+    sequence = np.random.SeedSequence([seed, cell, run_index])
+    return int(sequence.generate_state(1)[0])
+
+
+def run_cell(experiment, experiment_index: int, param_index: int, run_index: int, seed: int) -> tuple:
+    return experiment_index, param_index, run_index, experiment.run_cell(param_index, seed)
+
+
+def run_grid(
+    experiments: list,
+    processes: int | None = None,
+    seed: int = 0,
+    cache: ResultCache | None = None,
+    remeasure: bool = False,
+) -> list[str]:
+    # Cached timings of exclusive experiments come back with the environment they were measured in;
+    # remeasure times those cells again instead and replaces their cached timings
+    processes = processes or os.cpu_count() or 1
+    results = [[[None] * experiment.num_runs for _ in experiment.param_values] for experiment in experiments]
+    cells = []
+    cache_keys = {}
+    for experiment_index, experiment in enumerate(experiments):
+        for param_index, param_value in enumerate(experiment.param_values):
+            for run_index in range(experiment.num_runs):
+                cell = (experiment, experiment_index, param_index, run_index)
+                run_seed = cell_seed(seed, experiment.key, param_value, run_index)
+                if cache is not None:
+                    key = cache.key(experiment._create_config(param_value), run_seed)
+                    cached = None if remeasure and experiment.exclusive else cache.get(experiment.cache_kind, key)
+                    if cached is not None:
+                        metadata = cache.get_metadata(experiment.cache_kind, key)
+                        results[experiment_index][param_index][run_index] = experiment.from_cache(cached, metadata)
+                        continue
+                    cache_keys[cell[1:]] = key
+                cells.append(cell + (run_seed,))
+
+    # Cells of exclusive experiments (timings) run alone after the pool, so other runs do not skew them
+    parallel_cells = [cell for cell in cells if processes > 1 and not cell[0].exclusive]
+    serial_cells = [cell for cell in cells if processes == 1 or cell[0].exclusive]
+
+    def collect(experiment_index: int, param_index: int, run_index: int, result: list[float] | float) -> None:
+        results[experiment_index][param_index][run_index] = result
+        if cache is not None:
+            experiment = experiments[experiment_index]
+            key = cache_keys[(experiment_index, param_index, run_index)]
+            cache.put(experiment.cache_kind, key, result, experiment.cache_metadata())
+
+    total_cells = sum(len(experiment.param_values) * experiment.num_runs for experiment in experiments)
+    logger.info("Running %d of %d cells in %d processes, the rest are cached", len(cells), total_cells, processes)
+    try:
+        if parallel_cells:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                futures = [executor.submit(run_cell, *cell) for cell in parallel_cells]
+                for future in as_completed(futures):
+                    collect(*future.result())
+
+        for cell in serial_cells:
+            collect(*run_cell(*cell))
+    finally:
+        # Cells finished before an interruption are kept, so the next run only computes the rest
+        if cache is not None:
+            cache.save()
+
+    return [experiment.finish(experiment_results) for experiment, experiment_results in zip(experiments, results)]
@@ -0,0 +1,153 @@
+import itertools
+import json
+import logging
+import math
+import os
+
+import numpy as np
+
+from lib.config import Config
+
+from .base_experiment import AccuracyExperiment
+from .cache import ResultCache
+from .runner import run_grid
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SPACE = {
+    "mutation_rate": np.arange(0, 0.5, 0.05),
+    "crossover_rate": np.arange(0.5, 1.0, 0.1),
+    "population_size": np.arange(50, 300, 50),
+    "tournament_size": np.arange(2, 6),
+}
+
+
+def to_python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class CandidateExperiment(AccuracyExperiment):
+    # Runs each candidate configuration for a fixed number of generations; param values are candidate indices
+    def __init__(self, candidates: list[dict], indices: list[int], generations: int, base_config: Config, **kwargs):
+        super().__init__(param_name="candidate", param_values=np.array(indices), base_config=base_config, **kwargs)
+        self.candidates = candidates
+        self.generations = generations
+
+    def _create_config(self, param_value: float) -> Config:
+        candidate = self.candidates[int(param_value)]
+        config = self.base_config.__dict__.copy()
+        config.update(candidate)
+        if "population_size" in candidate and "elite_size" not in candidate:
+            config["elite_size"] = max(1, int(candidate["population_size"] * 0.05))
+        config["generations"] = self.generations
+        return type(self.base_config)(**config)
+
+    def finish(self, all_results: list[list]) -> list[list]:
+        return all_results
+
+
+class SuccessiveHalvingTuner:
+    def __init__(
+        self,
+        base_config: Config,
+        search_space: dict,
+        num_candidates: int = 27,
+        min_generations: int = 5,
+        eta: int = 3,
+        num_runs: int = 3,
+        output_dir: str = "results",
+        processes: int | None = None,
+        seed: int = 0,
+        cache: ResultCache | None = None,
+    ):
+        self.base_config = base_config
+        self.search_space = search_space
+        self.num_candidates = num_candidates
+        self.min_generations = min_generations
+        self.eta = eta
+        self.num_runs = num_runs
+        self.output_dir = output_dir
+        self.processes = processes
+        self.seed = seed
+        self.cache = cache
+
+    def _sample_candidates(self) -> list[dict]:
+        names = list(self.search_space)
+        values = [[to_python(value) for value in self.search_space[name]] for name in names]
+        if math.prod(len(v) for v in values) <= self.num_candidates:
+            return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+        rng = np.random.default_rng(self.seed)
+        candidates = []
+        while len(candidates) < self.num_candidates:
+            candidate = {name: v[rng.integers(len(v))] for name, v in zip(names, values)}
+            if candidate not in candidates:
+                candidates.append(candidate)
+        return candidates
+
+    def _budgets(self) -> list[int]:
+        # Generations per rung grow by eta up to the full run; each rung keeps the best 1/eta of the candidates
+        max_generations = self.base_config.generations
+        rungs = max(0, int(math.log(max_generations / self.min_generations, self.eta)))
+        return [int(max_generations / self.eta ** (rungs - rung)) for rung in range(rungs + 1)]
+
+    def run(self) -> tuple[Config, list[dict]]:
+        candidates = self._sample_candidates()
+        alive = list(range(len(candidates)))
+        trace = []
+
+        for rung, generations in enumerate(self._budgets()):
+            experiment = CandidateExperiment(
+                candidates, alive, generations, self.base_config, output_dir=self.output_dir, num_runs=self.num_runs
+            )
+            # Runs of a candidate keep their seeds across rungs, so a longer rung repeats the generations of the
+            # shorter one before going further; runs are not resumed, every rung recomputes its runs from generation 0
+            # (the cache keys on generations, so it only saves reruns of the same rung)
+            (results,) = run_grid([experiment], self.processes, self.seed, self.cache)
+
+            # Partial runs are compared by the best fitness of their last generation, lower is better
+            scores = [np.array([run[-1] for run in runs]) for runs in results]
+            order = np.argsort([score.mean() for score in scores])
+            keep = max(1, len(alive) // self.eta)
+            survivors = [alive[i] for i in order[:keep]]
+
+            for i, candidate_index in enumerate(alive):
+                trace.append(
+                    {
+                        "rung": rung,
+                        "generations": generations,
+                        "candidate": candidate_index,
+                        "config": candidates[candidate_index],
+                        "mean_fitness": float(scores[i].mean()),
+                        "std_fitness": float(scores[i].std()),
+                        "kept": candidate_index in survivors,
+                    }
+                )
+            logger.info(
+                "Rung %d: %d candidates ran %d generations, best mean fitness %.6f",
+                rung,
+                len(alive),
+                generations,
+                scores[order[0]].mean(),
+            )
+            alive = survivors
+
+        # The last rung runs the full number of generations, so its winner's config is the tuned config
+        best_config = experiment._create_config(alive[0])
+        self._save_trace(best_config, trace)
+        return best_config, trace
+
+    def _save_trace(self, best_config: Config, trace: list[dict]) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_file = os.path.join(self.output_dir, "tuning_trace.json")
+        best = {name: to_python(getattr(best_config, name)) for name in self.search_space}
+        with open(output_file, "w") as f:
+            json.dump({"best_config": best, "trace": trace}, f, indent=2)
+        logger.info("Best configuration %s, trace saved to %s", best, output_file)
+
+
+def run_test(base_config: Config, output_dir: str = "results", num_runs: int = 3) -> Config:
+    cache = ResultCache(os.path.join(output_dir, "cache"))
+    tuner = SuccessiveHalvingTuner(base_config, SEARCH_SPACE, num_runs=num_runs, output_dir=output_dir, cache=cache)
+    best_config, _ = tuner.run()
+    return best_config
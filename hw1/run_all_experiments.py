@@ -5,6 +5,8 @@ import time
 import numpy as np
 
 from experiments.base_experiment import AccuracyExperiment, TimeExperiment
+from experiments.cache import ResultCache
+from experiments.runner import run_grid
 from lib.config import Config
 
 logger = logging.getLogger(__name__)
@@ -41,7 +43,14 @@ def create_experiments(output_dir: str, num_runs: int) -> list[AccuracyExperimen
     return experiments
 
 
-def run_all_experiments(output_dir: str = "results", num_runs: int = 1) -> dict[str, str]:
+def run_all_experiments(
+    output_dir: str = "results",
+    num_runs: int = 1,
+    processes: int | None = None,
+    seed: int = 0,
+    use_cache: bool = True,
+    remeasure: bool = False,
+) -> dict[str, str]:
     os.makedirs(output_dir, exist_ok=True)
     start_time = time.time()
 
@@ -50,10 +59,12 @@ def run_all_experiments(output_dir: str = "results", num_runs: int = 1) -> dict[
     experiments = create_experiments(output_dir, num_runs)
     results = {}
 
-    for experiment in experiments:
+    # All runs of all experiments share one process pool; runs already in the cache are not repeated, and cached
+    # timings are reused with the environment they were measured in unless remeasure is set
+    cache = ResultCache(os.path.join(output_dir, "cache")) if use_cache else None
+    output_files = run_grid(experiments, processes, seed, cache, remeasure)
+    for experiment, output_file in zip(experiments, output_files):
         param_name = experiment.param_name
-        logger.info(f"Running {param_name} experiment...")
-        output_file = experiment.run()
         logger.info(f"{param_name} experiment completed. Results saved to {output_file}")
         results[param_name] = output_file
 
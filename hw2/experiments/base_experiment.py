@@ -1,11 +1,16 @@
 import logging
 import os
+import random
 
 import numpy as np
+from lib.benchmark import environment, measure, save_results, summarize_measurements
 from lib.config import Config
 from lib.genetic import GeneticAlgorithm
 from lib.visualization import plot_2d_line, plot_3d_surface
 
+from .cache import ResultCache
+from .runner import run_grid
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +28,9 @@ def calculate_distance(tour: np.ndarray) -> float:
 
 
 class BaseExperiment:
+    # Exclusive experiments measure time, so their runs are not shared with other runs of the grid
+    exclusive = False
+
     def __init__(
         self,
         param_name: str,
@@ -56,20 +64,39 @@ class BaseExperiment:
     def _create_visualization(self, processed_results: np.ndarray) -> str:
         raise NotImplementedError
 
-    def run(self) -> str:
-        os.makedirs(self.output_dir, exist_ok=True)
-        all_results = []
+    @property
+    def key(self) -> str:
+        return f"{type(self).__name__}:{self.param_name}"
+
+    @property
+    def cache_kind(self) -> str:
+        # Runs of one kind share a cache table whatever parameter the experiment varies
+        return type(self).__name__
+
+    def cache_metadata(self) -> dict | None:
+        # Stored with every computed cell and handed back to from_cache
+        return None
 
-        for param_value in self.param_values:
-            param_results = []
-            for _ in range(self.num_runs):
-                result = self._run_experiment(param_value)
-                param_results.append(result)
-            all_results.append(param_results)
+    def from_cache(self, values: np.ndarray, metadata: dict | None = None) -> list[float] | float:
+        return values.tolist()
 
+    def run_cell(self, param_index: int, seed: int) -> list[float] | float:
+        # Pool workers do not see the globals set by the parent process
+        global cities_global
+        cities_global = self.base_config.cities
+
+        random.seed(seed)
+        np.random.seed(seed)
+        return self._run_experiment(self.param_values[param_index])
+
+    def finish(self, all_results: list[list]) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
         processed_results = self._process_results(all_results)
         return self._create_visualization(processed_results)
 
+    def run(self, processes: int = 1, seed: int = 0, cache: ResultCache | None = None, remeasure: bool = False) -> str:
+        return run_grid([self], processes, seed, cache, remeasure)[0]
+
 
 class AccuracyExperiment(BaseExperiment):
     def _run_experiment(self, param_value: float) -> list[float]:
@@ -101,28 +128,59 @@ class AccuracyExperiment(BaseExperiment):
 
 
 class TimeExperiment(BaseExperiment):
-    def _run_experiment(self, param_value: float) -> float:
-        import time
+    exclusive = True
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Environments of the cells served from the cache, so the saved timings name where they were measured
+        self.cached_environments = []
+
+    def cache_metadata(self) -> dict:
+        return environment()
+
+    def from_cache(self, values: np.ndarray, metadata: dict | None = None) -> list[float]:
+        self.cached_environments.append(metadata)
+        return super().from_cache(values)
+
+    def _run_experiment(self, param_value: float) -> list[float]:
         config = self._create_config(param_value)
-        ga = GeneticAlgorithm(fitness_function=calculate_distance, config=config)
+        measurement = measure(lambda: GeneticAlgorithm(fitness_function=calculate_distance, config=config).run())
 
-        start_time = time.time()
-        ga.run()
-        return time.time() - start_time
+        # Flat, so the result cache can store it: trial count, wall times, CPU times, peak memory
+        repeat = len(measurement["wall_time"])
+        return [repeat] + measurement["wall_time"] + measurement["cpu_time"] + [measurement["peak_memory"] or 0]
 
-    def _process_results(self, all_results: list[list[float]]) -> np.ndarray:
-        return np.mean(all_results, axis=1)
+    @staticmethod
+    def _measurement(result: list[float]) -> dict:
+        repeat = int(result[0])
+        return {
+            "wall_time": result[1 : 1 + repeat],
+            "cpu_time": result[1 + repeat : 1 + 2 * repeat],
+            "peak_memory": int(result[-1]),
+        }
 
-    def _create_visualization(self, processed_results: np.ndarray) -> str:
-        output_file = os.path.join(self.output_dir, f"{self.param_name}_time.png")
+    def _process_results(self, all_results: list[list[list[float]]]) -> list[dict]:
+        return [summarize_measurements([self._measurement(result) for result in runs]) for runs in all_results]
 
+    def _create_visualization(self, processed_results: list[dict]) -> str:
+        output_file = os.path.join(self.output_dir, f"{self.param_name}_time.png")
+        benchmarks = {f"{self.param_name}={value}": stats for value, stats in zip(self.param_values, processed_results)}
+        environments = []
+        measured = len(self.cached_environments) < len(self.param_values) * self.num_runs
+        for measured_in in self.cached_environments + ([environment()] if measured else []):
+            if measured_in is not None and measured_in not in environments:
+                environments.append(measured_in)
+        self.cached_environments = []
+        save_results(benchmarks, os.path.join(self.output_dir, f"{self.param_name}_time.json"), environments)
+
+        wall_times = [stats["wall_time"] for stats in processed_results]
         plot_2d_line(
             x_values=self.param_values,
-            y_values=processed_results,
+            y_values=[t["median"] for t in wall_times],
             x_label=self.param_name.title(),
-            y_label="Average Execution Time (s)",
+            y_label="Median Execution Time (s)",
             title=f"{self.param_name.title()} vs Execution Time",
             output_file=output_file,
+            y_errors=[[t["median"] - t["q1"] for t in wall_times], [t["q3"] - t["median"] for t in wall_times]],
         )
         return output_file
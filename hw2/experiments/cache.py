@@ -0,0 +1,94 @@
+import dataclasses
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+# Files whose code decides what a run returns; changing any of them starts a new cache version
+CODE_FILES = ["lib/genetic.py", "lib/config.py", "lib/benchmark.py", "experiments/base_experiment.py"]
+
+
+def code_version() -> str:
+    digest = hashlib.sha256()
+    for name in CODE_FILES:
+        digest.update((ROOT_DIR / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot hash {type(value).__name__}")
+
+
+class ResultCache:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.version = code_version()
+        self.tables = {}
+        # Per kind, optional JSON metadata of a row, e.g. the environment a timing was measured in
+        self.metadata = {}
+        self.dirty = set()
+
+    def _path(self, kind: str) -> str:
+        return os.path.join(self.cache_dir, f"{kind}-{self.version}.npz")
+
+    def _metadata_path(self, kind: str) -> str:
+        return os.path.join(self.cache_dir, f"{kind}-{self.version}.json")
+
+    def _table(self, kind: str) -> dict:
+        if kind not in self.tables:
+            self.tables[kind] = {}
+            if os.path.exists(self._path(kind)):
+                with np.load(self._path(kind)) as data:
+                    # Rows of any length are stored back to back, row i is values[offsets[i]:offsets[i + 1]]
+                    offsets = data["offsets"]
+                    for i, key in enumerate(data["keys"].tolist()):
+                        self.tables[kind][key] = data["values"][offsets[i] : offsets[i + 1]]
+            self.metadata[kind] = {}
+            if os.path.exists(self._metadata_path(kind)):
+                with open(self._metadata_path(kind)) as f:
+                    self.metadata[kind] = json.load(f)
+        return self.tables[kind]
+
+    def key(self, config, seed: int) -> str:
+        payload = {"config": dataclasses.asdict(config), "seed": seed}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=to_json).encode()).hexdigest()
+
+    def get(self, kind: str, key: str) -> np.ndarray | None:
+        return self._table(kind).get(key)
+
+    def get_metadata(self, kind: str, key: str) -> dict | None:
+        self._table(kind)
+        return self.metadata[kind].get(key)
+
+    def put(self, kind: str, key: str, result: list[float] | float, metadata: dict | None = None) -> None:
+        self._table(kind)[key] = np.atleast_1d(np.asarray(result, dtype=np.float64))
+        if metadata is not None:
+            self.metadata[kind][key] = metadata
+        self.dirty.add(kind)
+
+    def save(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for kind in self.dirty:
+            rows = self.tables[kind]
+            keys = list(rows)
+            offsets = np.cumsum([0] + [len(rows[key]) for key in keys])
+            values = np.concatenate([rows[key] for key in keys]) if keys else np.empty(0)
+
+            path = self._path(kind)
+            with open(path + ".tmp", "wb") as f:
+                np.savez_compressed(f, keys=np.array(keys), offsets=offsets, values=values)
+            os.replace(path + ".tmp", path)
+
+            if self.metadata[kind]:
+                metadata_path = self._metadata_path(kind)
+                with open(metadata_path + ".tmp", "w") as f:
+                    json.dump(self.metadata[kind], f, sort_keys=True)
+                os.replace(metadata_path + ".tmp", metadata_path)
+        self.dirty.clear()
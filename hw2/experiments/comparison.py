@@ -1,10 +1,10 @@
 import itertools
 import logging
 import os
-import time
 
 import matplotlib.pyplot as plt
 import numpy as np
+from lib.benchmark import REPEAT, measure, save_results, summarize_measurements
 from lib.config import Config
 from lib.genetic import GeneticAlgorithm
 
@@ -23,11 +23,9 @@ def calculate_distance(tour: np.ndarray, cities: np.ndarray) -> float:
     return total_distance
 
 
-def solve_tsp_brute_force(cities: np.ndarray) -> tuple[float, float]:
+def solve_tsp_brute_force(cities: np.ndarray) -> float:
     num_cities = len(cities)
 
-    start_time = time.time()
-
     best_distance = float("inf")
     all_tours = list(itertools.permutations(range(num_cities)))
 
@@ -37,13 +35,10 @@ def solve_tsp_brute_force(cities: np.ndarray) -> tuple[float, float]:
         if distance < best_distance:
             best_distance = distance
 
-    end_time = time.time()
-    execution_time = end_time - start_time
-
-    return best_distance, execution_time
+    return best_distance
 
 
-def solve_tsp_genetic(cities: np.ndarray, generations: int, population_size: int) -> tuple[float, float]:
+def solve_tsp_genetic(cities: np.ndarray, generations: int, population_size: int) -> float:
     def fitness_func(tour: np.ndarray) -> float:
         return calculate_distance(tour, cities)
 
@@ -58,17 +53,12 @@ def solve_tsp_genetic(cities: np.ndarray, generations: int, population_size: int
     )
 
     ga = GeneticAlgorithm(fitness_function=fitness_func, config=config)
-
-    start_time = time.time()
     best_tour, best_distance = ga.run()
-    end_time = time.time()
 
-    execution_time = end_time - start_time
+    return best_distance
 
-    return best_distance, execution_time
 
-
-def run_test(output_dir: str = "results", num_runs: int = 5) -> str:
+def run_test(output_dir: str = "results", num_runs: int = 5, repeat: int = REPEAT) -> str:
     os.makedirs(output_dir, exist_ok=True)
 
     city_counts = range(3, 11)
@@ -76,49 +66,59 @@ def run_test(output_dir: str = "results", num_runs: int = 5) -> str:
     ga_times = []
     bf_distances = []
     ga_distances = []
+    benchmarks = {}
 
     np.random.seed(42)
 
     for n in city_counts:
         logger.info(f"Testing with {n} cities...")
 
-        bf_time_sum = 0
-        ga_time_sum = 0
+        bf_measurements = []
+        ga_measurements = []
         bf_distance_sum = 0
         ga_distance_sum = 0
 
         for run in range(num_runs):
             cities = np.random.rand(n, 2) * 100
 
-            bf_distance, bf_time = solve_tsp_brute_force(cities)
-            bf_time_sum += bf_time
-            bf_distance_sum += bf_distance
-
             # Для генетического алгоритма используем параметры, которые дадут хорошее решение
             # Увеличиваем количество поколений и размер популяции для более сложных задач
             population_size = max(50, n * 10)
             generations = max(20, n * 5)
 
-            ga_distance, ga_time = solve_tsp_genetic(cities, generations, population_size)
-            ga_time_sum += ga_time
+            # The first call of each solver gives its distance and doubles as the warm-up run
+            bf_distance = solve_tsp_brute_force(cities)
+            bf_measurements.append(measure(lambda: solve_tsp_brute_force(cities), warmup=0, repeat=repeat))
+            bf_distance_sum += bf_distance
+
+            ga_distance = solve_tsp_genetic(cities, generations, population_size)
+            ga_measurements.append(
+                measure(lambda: solve_tsp_genetic(cities, generations, population_size), warmup=0, repeat=repeat)
+            )
             ga_distance_sum += ga_distance
 
+            bf_time = np.median(bf_measurements[-1]["wall_time"])
+            ga_time = np.median(ga_measurements[-1]["wall_time"])
             logger.info(f"Run {run + 1}/{num_runs} - BF time: {bf_time:.4f}s, GA time: {ga_time:.4f}s")
             logger.info(f"BF distance: {bf_distance:.2f}, GA distance: {ga_distance:.2f}")
 
-        bf_times.append(bf_time_sum / num_runs)
-        ga_times.append(ga_time_sum / num_runs)
+        benchmarks[f"brute_force/cities={n}"] = summarize_measurements(bf_measurements)
+        benchmarks[f"genetic/cities={n}"] = summarize_measurements(ga_measurements)
+        bf_times.append(benchmarks[f"brute_force/cities={n}"]["wall_time"]["median"])
+        ga_times.append(benchmarks[f"genetic/cities={n}"]["wall_time"]["median"])
         bf_distances.append(bf_distance_sum / num_runs)
         ga_distances.append(ga_distance_sum / num_runs)
 
-        logger.info(f"Average for {n} cities - BF time: {bf_times[-1]:.4f}s, GA time: {ga_times[-1]:.4f}s")
+        logger.info(f"Median for {n} cities - BF time: {bf_times[-1]:.4f}s, GA time: {ga_times[-1]:.4f}s")
+
+    save_results(benchmarks, os.path.join(output_dir, "bf_vs_ga_benchmark.json"))
 
     # Создаем график времени выполнения
     plt.figure(figsize=(10, 6))
     plt.plot(list(city_counts), bf_times, marker="o", label="Brute Force")
     plt.plot(list(city_counts), ga_times, marker="s", label="Genetic Algorithm")
     plt.xlabel("Number of Cities")
-    plt.ylabel("Execution Time (seconds)")
+    plt.ylabel("Median Execution Time (seconds)")
     plt.title("Execution Time Comparison: Brute Force vs Genetic Algorithm")
     plt.legend()
     plt.grid(True)
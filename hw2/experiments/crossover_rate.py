@@ -8,13 +8,11 @@ from .base_experiment import AccuracyExperiment
 logger = logging.getLogger(__name__)
 
 
-def run_test(base_config, output_dir="results", num_runs=10):
-    os.makedirs(output_dir, exist_ok=True)
-
+def create_experiment(base_config, output_dir="results", num_runs=10):
     step = 0.1
     crossover_rates = np.arange(0, 1.1, step)
 
-    experiment = AccuracyExperiment(
+    return AccuracyExperiment(
         param_name="crossover_rate",
         param_values=crossover_rates,
         base_config=base_config,
@@ -22,7 +20,11 @@ def run_test(base_config, output_dir="results", num_runs=10):
         num_runs=num_runs,
     )
 
-    return experiment.run()
+
+def run_test(base_config, output_dir="results", num_runs=10):
+    os.makedirs(output_dir, exist_ok=True)
+
+    return create_experiment(base_config, output_dir, num_runs).run()
 
 
 if __name__ == "__main__":
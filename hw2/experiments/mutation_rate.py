@@ -4,11 +4,11 @@ from lib.config import Config
 from .base_experiment import AccuracyExperiment
 
 
-def run_test(base_config: Config, output_dir: str = "results", num_runs: int = 10) -> str:
+def create_experiment(base_config: Config, output_dir: str = "results", num_runs: int = 10) -> AccuracyExperiment:
     step = 0.05
     mutation_rates = np.arange(0, 0.5, step)
 
-    experiment = AccuracyExperiment(
+    return AccuracyExperiment(
         param_name="mutation_rate",
         param_values=mutation_rates,
         base_config=base_config,
@@ -16,7 +16,9 @@ def run_test(base_config: Config, output_dir: str = "results", num_runs: int = 1
         num_runs=num_runs,
     )
 
-    return experiment.run()
+
+def run_test(base_config: Config, output_dir: str = "results", num_runs: int = 10) -> str:
+    return create_experiment(base_config, output_dir, num_runs).run()
 
 
 if __name__ == "__main__":
@@ -3,11 +3,11 @@ import numpy as np
 from .base_experiment import AccuracyExperiment
 
 
-def run_test(base_config, output_dir="results", num_runs=10):
+def create_experiment(base_config, output_dir="results", num_runs=10):
     step = 50
     population_sizes = np.arange(50, 500, step)
 
-    experiment = AccuracyExperiment(
+    return AccuracyExperiment(
         param_name="population_size",
         param_values=population_sizes,
         base_config=base_config,
@@ -15,7 +15,9 @@ def run_test(base_config, output_dir="results", num_runs=10):
         num_runs=num_runs,
     )
 
-    return experiment.run()
+
+def run_test(base_config, output_dir="results", num_runs=10):
+    return create_experiment(base_config, output_dir, num_runs).run()
 
 
 if __name__ == "__main__":
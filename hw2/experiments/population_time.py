@@ -4,11 +4,11 @@ from lib.config import Config
 from .base_experiment import TimeExperiment
 
 
-def run_test(base_config: Config, output_dir: str = "results", num_runs: int = 10) -> str:
+def create_experiment(base_config: Config, output_dir: str = "results", num_runs: int = 10) -> TimeExperiment:
     step = 50
     population_sizes = np.arange(50, 500, step)
 
-    experiment = TimeExperiment(
+    return TimeExperiment(
         param_name="population_size",
         param_values=population_sizes,
         base_config=base_config,
@@ -16,7 +16,9 @@ def run_test(base_config: Config, output_dir: str = "results", num_runs: int = 1
         num_runs=num_runs,
     )
 
-    return experiment.run()
+
+def run_test(base_config: Config, output_dir: str = "results", num_runs: int = 10) -> str:
+    return create_experiment(base_config, output_dir, num_runs).run()
 
 
 if __name__ == "__main__":
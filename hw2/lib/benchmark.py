@@ -0,0 +1,132 @@
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+WARMUP = 1
+REPEAT = 5
+CONFIDENCE = 0.95
+BOOTSTRAP_SAMPLES = 2000
+# A benchmark regressed when its median wall time grew by more than this and the confidence intervals do not overlap
+REGRESSION_THRESHOLD = 0.05
+
+
+def measure(func: Callable[[], object], warmup: int = WARMUP, repeat: int = REPEAT, memory: bool = True) -> dict:
+    for _ in range(warmup):
+        func()
+
+    wall_times = []
+    cpu_times = []
+    for _ in range(repeat):
+        # Garbage left by the previous trial is collected outside the timed region
+        gc.collect()
+        wall_start = time.perf_counter_ns()
+        cpu_start = time.process_time_ns()
+        func()
+        cpu_times.append((time.process_time_ns() - cpu_start) / 1e9)
+        wall_times.append((time.perf_counter_ns() - wall_start) / 1e9)
+
+    peak_memory = None
+    if memory:
+        # tracemalloc slows every allocation down, so memory is measured in a separate untimed trial
+        gc.collect()
+        tracemalloc.start()
+        func()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"wall_time": wall_times, "cpu_time": cpu_times, "peak_memory": peak_memory}
+
+
+def summarize(samples: list[float], seed: int = 0) -> dict:
+    samples = np.asarray(samples, dtype=np.float64)
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+
+    # Percentile bootstrap of the median, seeded so the same samples always give the same interval
+    rng = np.random.default_rng(seed)
+    resamples = np.median(rng.choice(samples, size=(BOOTSTRAP_SAMPLES, len(samples))), axis=1)
+    alpha = (1 - CONFIDENCE) / 2
+    ci_low, ci_high = np.percentile(resamples, [100 * alpha, 100 * (1 - alpha)])
+
+    return {
+        "n": len(samples),
+        "median": float(median),
+        "q1": float(q1),
+        "q3": float(q3),
+        "iqr": float(q3 - q1),
+        "ci_low": float(ci_low),
+        "ci_high": float(ci_high),
+        "min": float(samples.min()),
+        "max": float(samples.max()),
+    }
+
+
+def summarize_measurements(measurements: list[dict]) -> dict:
+    peaks = [m["peak_memory"] for m in measurements if m["peak_memory"] is not None]
+    return {
+        "wall_time": summarize([t for m in measurements for t in m["wall_time"]]),
+        "cpu_time": summarize([t for m in measurements for t in m["cpu_time"]]),
+        "peak_memory": max(peaks) if peaks else None,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def environment() -> dict:
+    return {
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(benchmarks: dict, output_file: str, environments: list[dict] | None = None) -> str:
+    # environments are those the samples were measured in, the current one by default; samples from several
+    # environments (e.g. cached timings of other commits) are listed under "environments"
+    environments = environments or [environment()]
+    if len(environments) == 1:
+        results = {"environment": environments[0], "benchmarks": benchmarks}
+    else:
+        results = {"environments": environments, "benchmarks": benchmarks}
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    return output_file
+
+
+def compare_results(baseline_file: str, current_file: str) -> list[str]:
+    with open(baseline_file) as f:
+        baseline = json.load(f)["benchmarks"]
+    with open(current_file) as f:
+        current = json.load(f)["benchmarks"]
+
+    regressions = []
+    for name in sorted(baseline.keys() & current.keys()):
+        old = baseline[name]["wall_time"]
+        new = current[name]["wall_time"]
+        if new["median"] > old["median"] * (1 + REGRESSION_THRESHOLD) and new["ci_low"] > old["ci_high"]:
+            regressions.append(f"{name}: median {old['median']:.6f}s -> {new['median']:.6f}s")
+    return regressions
+
+
+if __name__ == "__main__":
+    # python -m lib.benchmark baseline.json current.json; exits with 1 when a benchmark regressed
+    regressions = compare_results(sys.argv[1], sys.argv[2])
+    for regression in regressions:
+        print(regression)
+    sys.exit(1 if regressions else 0)
@@ -198,9 +198,12 @@ def plot_3d_surface(x_values, y_values, z_values, x_label, y_label, z_label, tit
     plt.close()
 
 
-def plot_2d_line(x_values, y_values, x_label, y_label, title, output_file):
+def plot_2d_line(x_values, y_values, x_label, y_label, title, output_file, y_errors=None):
     plt.figure(figsize=(10, 6))
-    plt.plot(x_values, y_values, marker="o")
+    if y_errors is not None:
+        plt.errorbar(x_values, y_values, yerr=y_errors, marker="o", capsize=4)
+    else:
+        plt.plot(x_values, y_values, marker="o")
     plt.xlabel(x_label)
     plt.ylabel(y_label)
     plt.title(title)
@@ -3,6 +3,8 @@ import os
 
 import numpy as np
 from experiments import crossover_rate, mutation_rate, population_size, population_time
+from experiments.cache import ResultCache
+from experiments.runner import run_grid
 from lib.config import Config
 
 logger = logging.getLogger(__name__)
@@ -14,7 +16,7 @@ logging.basicConfig(
 OUTPUT_DIR = "results"
 
 
-def run_all_experiments(output_dir=OUTPUT_DIR, num_runs=3):
+def run_all_experiments(output_dir=OUTPUT_DIR, num_runs=3, processes=None, seed=0, use_cache=True, remeasure=False):
     os.makedirs(output_dir, exist_ok=True)
 
     num_cities = 10
@@ -31,21 +33,15 @@ def run_all_experiments(output_dir=OUTPUT_DIR, num_runs=3):
         elite_size=5,
     )
 
-    logger.info("Running crossover rate experiment...")
-    crossover_output = crossover_rate.run_test(base_config, output_dir, num_runs)
-    logger.info("Output saved to %s", crossover_output)
+    modules = [crossover_rate, mutation_rate, population_size, population_time]
+    experiments = [module.create_experiment(base_config, output_dir, num_runs) for module in modules]
 
-    logger.info("Running mutation rate experiment...")
-    mutation_output = mutation_rate.run_test(base_config, output_dir, num_runs)
-    logger.info("Output saved to %s", mutation_output)
-
-    logger.info("Running population size experiment...")
-    pop_size_output = population_size.run_test(base_config, output_dir, num_runs)
-    logger.info("Output saved to %s", pop_size_output)
-
-    logger.info("Running population time experiment...")
-    pop_time_output = population_time.run_test(base_config, output_dir, num_runs)
-    logger.info("Output saved to %s", pop_time_output)
+    # All runs of all experiments share one process pool; runs already in the cache are not repeated, and cached
+    # timings are reused with the environment they were measured in unless remeasure is set
+    cache = ResultCache(os.path.join(output_dir, "cache")) if use_cache else None
+    logger.info("Running crossover rate, mutation rate, population size and population time experiments...")
+    for output_file in run_grid(experiments, processes, seed, cache, remeasure):
+        logger.info("Output saved to %s", output_file)
 
     # logger.info("Running brute force vs genetic algorithm comparison...")
     # comparison_output = comparison.run_test(output_dir, num_runs)
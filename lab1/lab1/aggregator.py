@@ -0,0 +1,404 @@
+import csv
+import logging
+import math
+import time
+from pathlib import Path
+
+import dataset
+import store
+from generate import VARIANTS, calculate_a_max
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+BASE_DIR = Path("data")
+POPULATION_SIZE = 200
+
+# A solver is named by the stem of its results file, e.g. genetic_results_warm for the warm start GA
+BRUTE_FORCE_SOLVER = "brute_force_results"
+GENETIC_SOLVER = "genetic_results"
+# Quantiles reported next to the mean; the sketch keeps each within SKETCH_ACCURACY relative error
+QUANTILES = [0.5, 0.9, 0.99]
+SKETCH_ACCURACY = 0.01
+# The live aggregator in the store writer rewrites the report files at most this often
+REFRESH_SECONDS = 10.0
+
+STATISTICS_HEADER = [
+    "",
+    "Среднее значение",
+    "Дисперсия",
+    "Среднее квадратичное откл.",
+    "Медиана",
+    "90-й процентиль",
+    "99-й процентиль",
+]
+SUMMARY_HEADER = [
+    "Вариант",
+    "n",
+    "a_max",
+    "divider",
+    "modulo",
+    "Среднее время нахождения первого решения",
+    "Среднее время нахождения всех решений",
+    "Среднее время нахождения точного решения ГА",
+    "Доля точно решённых задач ГА",
+    "Количество хромосом в поколении",
+]
+GENETIC_MODES_HEADER = [
+    "Вариант",
+    "Режим ГА",
+    "Число задач",
+    "Доля точно решённых задач ГА",
+    "Среднее время работы ГА",
+    "Среднее число поколений",
+    "Среднее число поколений до точного решения",
+]
+
+# Aggregator of the store writer process, fed by consume_batch
+_live = None
+_results_dir = None
+_last_refresh = 0.0
+
+
+def genetic_mode_name(solver: str) -> str:
+    # genetic_results holds the base GA runs, genetic_results_<mode> the runs of a GA option such as warm start
+    return solver[len(GENETIC_SOLVER) :].lstrip("_") or "base"
+
+
+def constant_statistics(value) -> dict:
+    return {"mean": value, "variance": 0, "std_dev": 0, "quantiles": {}}
+
+
+class RunningStats:
+    # Welford's update keeps the mean and the sum of squared deviations without keeping the samples
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value: float) -> None:
+        # Inverse of add, for a result replaced by a later one
+        self.count -= 1
+        if self.count == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+
+    def summary(self) -> dict:
+        # Population variance, the same as np.var over all samples
+        variance = self.m2 / self.count if self.count > 1 else None
+        return {
+            "mean": self.mean if self.count else None,
+            "variance": variance,
+            "std_dev": math.sqrt(variance) if variance is not None else None,
+        }
+
+
+class QuantileSketch:
+    # Log-spaced buckets as in DDSketch: a value x goes to bucket ceil(log_gamma(x)), so the number of buckets
+    # grows with the logarithm of the value range and not with the number of samples
+    def __init__(self, accuracy: float = SKETCH_ACCURACY) -> None:
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        bucket = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def remove(self, value: float) -> None:
+        self.count -= 1
+        if value <= 0:
+            self.zeros -= 1
+            return
+        bucket = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[bucket] -= 1
+        if not self.buckets[bucket]:
+            del self.buckets[bucket]
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return 2 * self.gamma**bucket / (self.gamma + 1)
+        return None
+
+
+class Aggregator:
+    def __init__(self) -> None:
+        # (variant, solver, metric) -> (RunningStats, QuantileSketch)
+        self.metrics = {}
+        # (variant, solver) -> [results, exact results]
+        self.counts = {}
+        # (variant, solver, problem_idx) -> (metric values, exact) of the result counted for the problem
+        self.results = {}
+        self.sources = set()
+        # variant -> indices of the problems in its problem list; results of other problems are not counted
+        self.problem_sets = {}
+
+    def add(self, variant_num: int, solver: str, metric: str, value: float) -> None:
+        running, sketch = self.metrics.setdefault((variant_num, solver, metric), (RunningStats(), QuantileSketch()))
+        running.add(value)
+        sketch.add(value)
+
+    def remove(self, variant_num: int, solver: str, metric: str, value: float) -> None:
+        running, sketch = self.metrics[(variant_num, solver, metric)]
+        running.remove(value)
+        sketch.remove(value)
+
+    def consume(self, path: Path, row: list) -> None:
+        # row is a results row as written by the solvers; numbers may still be strings
+        variant_num = int(path.parent.name[len("option") :])
+        solver = path.stem
+        problem_idx = int(row[0])
+        if problem_idx not in self.problem_indices(variant_num, path.parent):
+            return
+
+        values = []
+        exact = False
+        if solver == BRUTE_FORCE_SOLVER:
+            values = [("first_solution_time", float(row[1])), ("all_solutions_time", float(row[2]))]
+        elif solver.startswith(GENETIC_SOLVER):
+            time_used = float(row[1])
+            last_generation = int(row[4])
+            values = [("time_used", time_used), ("last_generation", last_generation)]
+            exact = int(row[2]) == 0
+            if exact:
+                values += [("exact_time", time_used), ("exact_generations", last_generation)]
+
+        # A re-solved problem replaces its stored row, so its earlier result is taken out before the new one is added
+        key = (variant_num, solver, problem_idx)
+        counts = self.counts.setdefault((variant_num, solver), [0, 0])
+        if key in self.results:
+            old_values, old_exact = self.results[key]
+            counts[0] -= 1
+            counts[1] -= old_exact
+            for metric, value in old_values:
+                self.remove(variant_num, solver, metric, value)
+
+        self.results[key] = (values, exact)
+        counts[0] += 1
+        counts[1] += exact
+        for metric, value in values:
+            self.add(variant_num, solver, metric, value)
+
+    def consume_csv(self, path: Path) -> None:
+        self.sources.add(path)
+        if not path.exists():
+            logging.warning(f"File not found: {path}")
+            return
+
+        with open(path, "r", newline="") as csvfile:
+            reader = csv.reader(csvfile, delimiter=",")
+            next(reader, None)
+            for row in reader:
+                if row:
+                    self.consume(path, row)
+
+    def consume_store(self, path: Path) -> None:
+        self.sources.add(path)
+        for row in store.load_rows(path):
+            self.consume(path, row)
+
+    def consume_variant(self, option_dir: Path) -> None:
+        for path in results_paths(option_dir):
+            self.consume_csv(path)
+
+    def consume_stored_variant(self, option_dir: Path) -> None:
+        # Live counterpart of consume_variant: stored results, and results files not taken into the store yet
+        stored = store.stored_paths(option_dir)
+        for path in stored:
+            self.consume_store(path)
+        for path in results_paths(option_dir):
+            if path not in stored and path.exists():
+                self.consume_csv(path)
+
+    def problem_indices(self, variant_num: int, option_dir: Path | None = None) -> set:
+        if variant_num not in self.problem_sets:
+            option_dir = option_dir or BASE_DIR / f"option{variant_num}"
+            self.problem_sets[variant_num] = load_problem_indices(option_dir)
+        return self.problem_sets[variant_num]
+
+    def problems_count(self, variant_num: int) -> int:
+        return len(self.problem_indices(variant_num))
+
+    def summary(self, variant_num: int, solver: str, metric: str) -> dict:
+        if (variant_num, solver, metric) not in self.metrics:
+            return {"mean": None, "variance": None, "std_dev": None, "quantiles": {}}
+
+        running, sketch = self.metrics[(variant_num, solver, metric)]
+        return dict(running.summary(), quantiles={q: sketch.quantile(q) for q in QUANTILES})
+
+    def exact_solution_ratio(self, variant_num: int, solver: str) -> float:
+        total_problems = self.problems_count(variant_num)
+        exact = self.counts.get((variant_num, solver), [0, 0])[1]
+        return exact / total_problems if total_problems > 0 else 0
+
+    def statistics(self, variant_num: int) -> dict:
+        variant = next(v for v in VARIANTS if v["number"] == variant_num)
+        return {
+            "n": constant_statistics(variant["n"]),
+            "a_max": constant_statistics(calculate_a_max(variant["n"], variant["divider"])),
+            "first_solution_time": self.summary(variant_num, BRUTE_FORCE_SOLVER, "first_solution_time"),
+            "all_solutions_time": self.summary(variant_num, BRUTE_FORCE_SOLVER, "all_solutions_time"),
+            "exact_solution_genetic_time": self.summary(variant_num, GENETIC_SOLVER, "exact_time"),
+            "exact_solution_ratio": constant_statistics(self.exact_solution_ratio(variant_num, GENETIC_SOLVER)),
+            "population_size": constant_statistics(POPULATION_SIZE),
+        }
+
+    def genetic_mode_statistics(self, variant_num: int) -> dict:
+        mode_stats = {}
+        for (counted_variant, solver), (problems, _) in sorted(self.counts.items()):
+            if counted_variant != variant_num or not solver.startswith(GENETIC_SOLVER):
+                continue
+
+            mode_stats[genetic_mode_name(solver)] = {
+                "problems": problems,
+                "exact_solution_ratio": self.exact_solution_ratio(variant_num, solver),
+                "mean_time": self.summary(variant_num, solver, "time_used")["mean"],
+                "mean_generations": self.summary(variant_num, solver, "last_generation")["mean"],
+                "exact_mean_generations": self.summary(variant_num, solver, "exact_generations")["mean"],
+            }
+        return mode_stats
+
+    def refresh(self, results_dir: Path) -> dict:
+        # Work depends on the number of variants and sketch buckets only, not on how many results were consumed
+        results_dir.mkdir(exist_ok=True, parents=True)
+
+        variant_stats = {variant["number"]: self.statistics(variant["number"]) for variant in VARIANTS}
+        for variant_num, stats in variant_stats.items():
+            save_statistics(stats, results_dir / f"statistics_variant_{variant_num}.csv")
+        save_summary(variant_stats, results_dir / "summary_statistics.csv")
+
+        genetic_mode_stats = {variant_num: self.genetic_mode_statistics(variant_num) for variant_num in variant_stats}
+        save_genetic_mode_statistics(genetic_mode_stats, results_dir / "genetic_modes_summary.csv")
+        return variant_stats
+
+
+def results_paths(option_dir: Path) -> list:
+    return [option_dir / f"{BRUTE_FORCE_SOLVER}.csv"] + sorted(option_dir.glob(f"{GENETIC_SOLVER}*.csv"))
+
+
+def load_problem_indices(option_dir: Path) -> set:
+    if dataset.has_dataset(option_dir):
+        return set(dataset.load_arrays(option_dir)["problem_indices"].tolist())
+
+    path = option_dir / "knapsack_problems.csv"
+    if not path.exists():
+        return set()
+    with open(path, "r", newline="") as csvfile:
+        reader = csv.reader(csvfile, delimiter=",")
+        next(reader, None)
+        return {int(row[0]) for row in reader if row}
+
+
+def optional(value):
+    return value if value is not None else ""
+
+
+def write_csv(path: Path, header: list, rows: list) -> None:
+    # Written aside and renamed, so a reader watching a live run never sees a half-written file
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerow(header)
+        writer.writerows(rows)
+    temporary_path.replace(path)
+
+
+def save_statistics(statistics: dict, path: Path) -> None:
+    try:
+        rows = [
+            [param, optional(values["mean"]), optional(values["variance"]), optional(values["std_dev"])]
+            + [optional(values["quantiles"].get(q)) for q in QUANTILES]
+            for param, values in statistics.items()
+        ]
+        write_csv(path, STATISTICS_HEADER, rows)
+        logging.info(f"Statistics saved to {path}")
+    except Exception as e:
+        logging.error(f"Error saving statistics to file: {e}")
+
+
+def save_summary(variant_stats: dict, path: Path) -> None:
+    rows = []
+    for variant_num, stats in variant_stats.items():
+        variant = next(v for v in VARIANTS if v["number"] == variant_num)
+        rows.append(
+            [
+                variant_num,
+                variant["n"],
+                stats["a_max"]["mean"],
+                variant["divider"],
+                "Да" if variant["modulo"] else "Нет",
+                optional(stats["first_solution_time"]["mean"]),
+                optional(stats["all_solutions_time"]["mean"]),
+                optional(stats["exact_solution_genetic_time"]["mean"]),
+                stats["exact_solution_ratio"]["mean"],
+                POPULATION_SIZE,
+            ]
+        )
+    write_csv(path, SUMMARY_HEADER, rows)
+
+
+def save_genetic_mode_statistics(mode_stats: dict, path: Path) -> None:
+    rows = [
+        [
+            variant_num,
+            mode,
+            stats["problems"],
+            stats["exact_solution_ratio"],
+            stats["mean_time"],
+            stats["mean_generations"],
+            optional(stats["exact_mean_generations"]),
+        ]
+        for variant_num, modes in mode_stats.items()
+        for mode, stats in modes.items()
+    ]
+    write_csv(path, GENETIC_MODES_HEADER, rows)
+    logging.info(f"GA mode comparison saved to {path}")
+
+
+def consume_batch(messages: list | None) -> None:
+    # Listener of the store writer: called with each committed batch of (path, problem_idx, row) messages and with
+    # None when the writer stops, so the report files follow a long run without re-reading the results
+    global _live, _results_dir, _last_refresh
+    if _live is None:
+        if not messages:
+            return
+        _live = Aggregator()
+        base_dir = Path(messages[0][0]).parent.parent
+        _results_dir = base_dir / "results"
+        # Results of earlier runs are counted once, after that only new rows are consumed
+        for variant in VARIANTS:
+            _live.consume_stored_variant(base_dir / f"option{variant['number']}")
+
+    for path, _, row in messages or []:
+        path = Path(path)
+        if path not in _live.sources:
+            _live.consume_store(path)
+        _live.consume(path, row)
+
+    if messages is None or time.time() - _last_refresh >= REFRESH_SECONDS:
+        _live.refresh(_results_dir)
+        _last_refresh = time.time()
@@ -1,15 +1,36 @@
 import ast
 import csv
-import fcntl
 import logging
 import multiprocessing
+import shutil
 import time
 from pathlib import Path
 
+import numpy as np
+
+import aggregator
+import dataset
+import scheduler
+import shared
+import store
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 BASE_DIR = Path("data")
-NUM_PROCESSES = 15
+# Enumeration cost grows with 2^n; the modular check does an extra remainder per item
+MODULO_COST_FACTOR = 1.3
+# Load vectors and problems into shared memory once and send workers only (variant, row) indices
+SHARED_MEMORY = True
+RESULTS_FILE = "brute_force_results.csv"
+# Set to stream every solution mask to solutions/problem<N>.bin next to the results; by default they are only counted
+SAVE_SOLUTIONS = False
+SOLUTIONS_DIR_NAME = "solutions"
+SOLUTION_BATCH_SIZE = 65536
+# When there are fewer problems than processes, each problem's masks are split into this many shards per process
+SHARDS_PER_PROCESS = 4
+# Shard workers are forked from the solving process, which already holds the vector
+SHARD_START_METHOD = "fork"
+RESULTS_HEADER = ["Номер задачи", "Время нахождения первого решения", "Время нахождения всех решений", "Число решений"]
 
 # Table of variants
 VARIANTS = [
@@ -25,6 +46,9 @@ VARIANTS = [
 
 
 def load_problems(path: Path) -> list:
+    if dataset.has_dataset(path.parent):
+        return dataset.load_problems(path.parent)
+
     problems = []
     with open(path, "r", newline="") as csvfile:
         reader = csv.reader(csvfile, delimiter=",")
@@ -39,6 +63,9 @@ def load_problems(path: Path) -> list:
 
 
 def load_vectors(path: Path) -> dict:
+    if dataset.has_dataset(path.parent):
+        return dataset.load_vectors(path.parent)
+
     vectors = {}
     with open(path, "r", newline="") as csvfile:
         reader = csv.reader(csvfile, delimiter=",")
@@ -51,22 +78,7 @@ def load_vectors(path: Path) -> dict:
 
 
 def load_existing_results(path: Path) -> set:
-    if not path.exists():
-        with open(path, "w", newline="") as csvfile:
-            writer = csv.writer(csvfile, delimiter=",")
-            writer.writerow(
-                ["Номер задачи", "Время нахождения первого решения", "Время нахождения всех решений", "Число решений"]
-            )
-        return set()
-
-    solved_problems = set()
-    with open(path, "r", newline="") as csvfile:
-        reader = csv.reader(csvfile, delimiter=",")
-        next(reader)
-        for row in reader:
-            if row:
-                solved_problems.add(int(row[0]))
-    return solved_problems
+    return store.load_results(path, RESULTS_HEADER)
 
 
 def is_solution_fast(vector: list, mask: int, target_mod: int, modulo: int, precomp_mods: list) -> bool:
@@ -85,52 +97,165 @@ def is_solution_no_modulo(vector: list, mask: int, target: int) -> bool:
     return total_weight == target
 
 
-def brute_force_solve(vector: list, target: int, use_modulo: bool) -> tuple:
+def mask_dtype(n: int) -> type:
+    return np.uint32 if n <= 32 else np.uint64
+
+
+def solutions_path(results_path: Path, problem_idx: int) -> Path:
+    return results_path.parent / SOLUTIONS_DIR_NAME / f"problem{problem_idx}.bin"
+
+
+def read_solutions(path: Path, n: int):
+    # Yields the stored masks batch by batch from a memory map, so reading is as bounded as writing
+    if path.stat().st_size == 0:
+        return
+    masks = np.memmap(path, dtype=mask_dtype(n), mode="r")
+    for start in range(0, len(masks), SOLUTION_BATCH_SIZE):
+        yield np.array(masks[start : start + SOLUTION_BATCH_SIZE])
+
+
+def brute_force_solve(
+    vector: list,
+    target: int,
+    use_modulo: bool,
+    first_only: bool = False,
+    output_path: Path | None = None,
+    masks: range | None = None,
+) -> tuple:
+    # Solutions are only counted; with output_path they are also streamed to that file as packed masks.
+    # masks limits the enumeration to one shard of the mask space
     n = len(vector)
+    if masks is None:
+        masks = range(1, 1 << n)
     first_solution_time = 0
-    all_solutions = []
+    first_solution = None
+    solutions_count = 0
+    batch = []
+    output = None
     start_time = time.time()
 
-    if use_modulo:
-        modulo = max(vector) + 1
-        target_mod = target % modulo
-        precomp_mods = [v % modulo for v in vector]
-
-        for mask in range(1, 1 << n):
-            if is_solution_fast(vector, mask, target_mod, modulo, precomp_mods):
-                if not all_solutions:
-                    first_solution_time = time.time() - start_time
-                all_solutions.append(mask)
-    else:
-        for mask in range(1, 1 << n):
-            if is_solution_no_modulo(vector, mask, target):
-                if not all_solutions:
-                    first_solution_time = time.time() - start_time
-                all_solutions.append(mask)
+    # Called only on hits, so the enumeration loops stay as tight as the plain check
+    def record(mask: int) -> None:
+        nonlocal first_solution_time, first_solution, solutions_count
+        if first_solution is None:
+            first_solution_time = time.time() - start_time
+            first_solution = mask
+        solutions_count += 1
+        if output is not None:
+            batch.append(mask)
+            if len(batch) >= SOLUTION_BATCH_SIZE:
+                np.array(batch, dtype=mask_dtype(n)).tofile(output)
+                batch.clear()
+
+    if output_path is not None:
+        output_path.parent.mkdir(exist_ok=True, parents=True)
+        output = open(output_path, "wb")
+    try:
+        if use_modulo:
+            modulo = max(vector) + 1
+            target_mod = target % modulo
+            precomp_mods = [v % modulo for v in vector]
+
+            for mask in masks:
+                if is_solution_fast(vector, mask, target_mod, modulo, precomp_mods):
+                    record(mask)
+                    if first_only:
+                        break
+        else:
+            for mask in masks:
+                if is_solution_no_modulo(vector, mask, target):
+                    record(mask)
+                    if first_only:
+                        break
+    finally:
+        if output is not None:
+            np.array(batch, dtype=mask_dtype(n)).tofile(output)
+            output.close()
 
     total_time = time.time() - start_time
-    return first_solution_time, total_time, len(all_solutions), all_solutions
+    return first_solution_time, total_time, solutions_count, first_solution
+
+
+def shard_ranges(n: int, shards: int) -> list:
+    # Contiguous shards keep the sequential enumeration order inside each shard and across shard indices
+    bounds = [1 + ((1 << n) - 1) * k // shards for k in range(shards + 1)]
+    return [range(bounds[k], bounds[k + 1]) for k in range(shards) if bounds[k] < bounds[k + 1]]
+
+
+def solve_shard(args: tuple) -> tuple:
+    shard_idx, vector, target, use_modulo, first_only, output_path, masks = args
+    start_time = time.time()
+    first_time, _, solutions_count, first_solution = brute_force_solve(
+        vector, target, use_modulo, first_only, output_path, masks
+    )
+    # The first hit is reported as an absolute time, so hits of different shards can be compared
+    first_hit_at = start_time + first_time if first_solution is not None else None
+    return shard_idx, first_hit_at, solutions_count, first_solution
+
+
+def merge_shard_files(shard_paths: list, output_path: Path) -> None:
+    with open(output_path, "wb") as output:
+        for path in shard_paths:
+            if path.exists():
+                with open(path, "rb") as shard:
+                    shutil.copyfileobj(shard, output)
+                path.unlink()
+
+
+def brute_force_solve_parallel(
+    vector: list,
+    target: int,
+    use_modulo: bool,
+    processes: int,
+    first_only: bool = False,
+    output_path: Path | None = None,
+) -> tuple:
+    # Same result as brute_force_solve, with the first solution time taken as the earliest hit of any shard
+    start_time = time.time()
+    shards = shard_ranges(len(vector), processes * SHARDS_PER_PROCESS)
+    shard_paths = [
+        output_path.with_name(f"{output_path.stem}.shard{k}{output_path.suffix}") if output_path else None
+        for k in range(len(shards))
+    ]
+    shard_args = [(k, vector, target, use_modulo, first_only, shard_paths[k], masks) for k, masks in enumerate(shards)]
+
+    results = []
+    context = multiprocessing.get_context(SHARD_START_METHOD)
+    # Leaving the with block terminates the pool, which cancels the remaining shards after an early exit
+    with context.Pool(processes) as pool:
+        for result in pool.imap_unordered(solve_shard, shard_args):
+            results.append(result)
+            if first_only and result[2] > 0:
+                break
+
+    if output_path is not None:
+        merge_shard_files(shard_paths, output_path)
+
+    hits = sorted(result for result in results if result[2] > 0)
+    solutions_count = sum(result[2] for result in hits)
+    if first_only:
+        solutions_count = min(solutions_count, 1)
+    first_solution_time = min(result[1] for result in hits) - start_time if hits else 0
+    first_solution = hits[0][3] if hits else None
+    return first_solution_time, time.time() - start_time, solutions_count, first_solution
 
 
 def save_result_to_file(result: tuple, path: Path) -> None:
     problem_idx, first_time, total_time, solutions_count = result
-    with open(path, "a", newline="") as csvfile:
-        fcntl.flock(csvfile, fcntl.LOCK_EX)
-        try:
-            writer = csv.writer(csvfile, delimiter=",")
-            writer.writerow([problem_idx, "%.6f" % first_time, "%.6f" % total_time, solutions_count])
-        finally:
-            fcntl.flock(csvfile, fcntl.LOCK_UN)
+    store.put(path, problem_idx, [problem_idx, "%.6f" % first_time, "%.6f" % total_time, solutions_count])
 
 
-def solve_single_problem(args: tuple) -> tuple:
+def solve_single_problem(args: tuple, processes: int = 1) -> tuple:
     problem_idx, vector_idx, target, ratio, vector, use_modulo, results_path = args
-    first_time, total_time, solutions_count, solutions = brute_force_solve(vector, target, use_modulo)
-
-    decoded_solutions = []
-    for mask in solutions:
-        solution = [1 if mask & (1 << i) else 0 for i in range(len(vector))]
-        decoded_solutions.append(solution)
+    output_path = solutions_path(results_path, problem_idx) if SAVE_SOLUTIONS else None
+    if processes > 1:
+        first_time, total_time, solutions_count, _ = brute_force_solve_parallel(
+            vector, target, use_modulo, processes, output_path=output_path
+        )
+    else:
+        first_time, total_time, solutions_count, _ = brute_force_solve(
+            vector, target, use_modulo, output_path=output_path
+        )
 
     result = (problem_idx, first_time, total_time, solutions_count)
     save_result_to_file(result, results_path)
@@ -138,32 +263,66 @@ def solve_single_problem(args: tuple) -> tuple:
     return result
 
 
+def solve_sharded_problem(args: tuple) -> tuple:
+    return solve_single_problem(args, scheduler.NUM_PROCESSES)
+
+
+def estimate_task_cost(vector: list, use_modulo: bool) -> float:
+    # Big a_max means wider integers in every addition of the enumeration loop
+    cost = len(vector) * 2 ** len(vector) * max(vector).bit_length()
+    return cost * MODULO_COST_FACTOR if use_modulo else cost
+
+
+def build_tasks(problems: list, vectors: dict, solved_problems: set, use_modulo: bool, results_path: Path) -> list:
+    unsolved_problems = [p for p in problems if p[0] not in solved_problems]
+    return [
+        (
+            estimate_task_cost(vectors[p[1]], use_modulo),
+            solve_single_problem,
+            (p[0], p[1], p[2], p[3], vectors[p[1]], use_modulo, results_path),
+        )
+        for p in unsolved_problems
+    ]
+
+
 def solve_all_problems_parallel(
     problems: list, vectors: dict, solved_problems: set, use_modulo: bool, results_path: Path
 ) -> None:
-    unsolved_problems = [p for p in problems if p[0] not in solved_problems]
-    if not unsolved_problems:
+    tasks = build_tasks(problems, vectors, solved_problems, use_modulo, results_path)
+    if not tasks:
         logging.info("All problems already solved")
         return
 
-    problem_args = [(p[0], p[1], p[2], p[3], vectors[p[1]], use_modulo, results_path) for p in unsolved_problems]
-    logging.info("Starting %d processes for %d unsolved problems", NUM_PROCESSES, len(problem_args))
+    logging.info("Scheduling %d unsolved problems", len(tasks))
+    scheduler.run_tasks(tasks)
 
-    with multiprocessing.Pool(processes=NUM_PROCESSES) as pool:
-        pool.map(solve_single_problem, problem_args)
 
+def solve_shared_problem(task: tuple) -> tuple:
+    variant_num, row = task
+    problem_idx, vector_idx, target, ratio, vector = shared.load_problem(variant_num, row)
+    use_modulo = VARIANTS[variant_num - 1]["modulo"]
+    results_path = BASE_DIR / f"option{variant_num}" / RESULTS_FILE
+    return solve_single_problem((problem_idx, vector_idx, target, ratio, vector, use_modulo, results_path))
 
-def solve_for_variant(variant_num: int) -> None:
+
+def share_tasks(variant_num: int, tasks: list, descriptors: dict) -> list:
+    problems = [args[:4] for _, _, args in tasks]
+    vectors = {args[1]: args[4] for _, _, args in tasks}
+    descriptors[variant_num] = shared.share_variant(vectors, problems)
+    return [(cost, solve_shared_problem, (variant_num, row)) for row, (cost, _, _) in enumerate(tasks)]
+
+
+def collect_tasks(variant_num: int) -> list:
     variant = next((v for v in VARIANTS if v["number"] == variant_num), None)
     if not variant:
         logging.error(f"Invalid variant number: {variant_num}")
-        return
+        return []
 
     option_dir = BASE_DIR / f"option{variant_num}"
 
     vectors_path = option_dir / "knapsack_vectors.csv"
     problems_path = option_dir / "knapsack_problems.csv"
-    results_path = option_dir / "brute_force_results.csv"
+    results_path = option_dir / RESULTS_FILE
 
     use_modulo = variant["modulo"]
 
@@ -176,16 +335,66 @@ def solve_for_variant(variant_num: int) -> None:
     solved_problems = load_existing_results(results_path)
     logging.info("Found %d already solved problems for variant %d", len(solved_problems), variant_num)
 
-    solve_all_problems_parallel(problems, vectors, solved_problems, use_modulo, results_path)
+    return build_tasks(problems, vectors, solved_problems, use_modulo, results_path)
+
+
+def export_results(variant_num: int) -> None:
+    store.export_csv(BASE_DIR / f"option{variant_num}" / RESULTS_FILE, RESULTS_HEADER)
+
+
+def solve_for_variant(variant_num: int) -> None:
+    solve_variants([variant_num])
     logging.info("Completed brute force solutions for variant %d", variant_num)
 
 
+def run_variant_tasks(tasks_by_variant: dict, results_queue: multiprocessing.Queue) -> None:
+    unsolved = [task for variant_tasks in tasks_by_variant.values() for task in variant_tasks]
+    if 0 < len(unsolved) < scheduler.NUM_PROCESSES:
+        # Too few problems to fill the pool, so each problem's enumeration is split across all processes instead;
+        # they run here, with the pool's time limit, and send their results to the same writer
+        scheduler.run_inline([(cost, solve_sharded_problem, args) for cost, _, args in unsolved])
+        return
+
+    # All variants share one pool so the slowest problems of every variant start first
+    tasks = []
+    descriptors = {}
+    for variant, variant_tasks in tasks_by_variant.items():
+        if SHARED_MEMORY and variant_tasks:
+            shared_tasks = share_tasks(variant, variant_tasks, descriptors)
+            logging.info(
+                "Variant %d task payloads: %d bytes pickled, %d bytes with shared memory",
+                variant,
+                scheduler.payload_bytes(variant_tasks),
+                scheduler.payload_bytes(shared_tasks),
+            )
+            variant_tasks = shared_tasks
+        tasks.extend(variant_tasks)
+
+    scheduler.configure([(shared.attach, (descriptors,)), (store.attach, (results_queue,))])
+    scheduler.run_tasks(tasks)
+
+
+def solve_variants(variant_nums: list) -> None:
+    tasks_by_variant = {variant_num: collect_tasks(variant_num) for variant_num in variant_nums}
+    # Workers, and the sharded problems solved in this process, send results to a single writer process instead
+    # of appending to the CSV files themselves
+    results_queue = store.start(aggregator.consume_batch)
+    try:
+        run_variant_tasks(tasks_by_variant, results_queue)
+    finally:
+        scheduler.shutdown()
+        shared.release()
+        store.stop()
+    for variant_num in variant_nums:
+        export_results(variant_num)
+
+
 def main() -> None:
     if multiprocessing.get_start_method() != "spawn":
         multiprocessing.set_start_method("spawn", force=True)
 
-    for variant in range(8):
-        solve_for_variant(variant + 1)
+    solve_variants([variant["number"] for variant in VARIANTS])
+    logging.info("Completed brute force solutions for all variants")
 
 
 if __name__ == "__main__":
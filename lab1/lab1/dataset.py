@@ -0,0 +1,146 @@
+import ast
+import csv
+import logging
+import shutil
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DATASET_DIR_NAME = "dataset"
+BASE_DIR = Path("data")
+ARRAY_NAMES = ["vectors", "vector_indices", "a_max", "problem_indices", "problem_vectors", "targets", "ratios"]
+
+
+def dataset_dir(option_dir: Path) -> Path:
+    return option_dir / DATASET_DIR_NAME
+
+
+def has_dataset(option_dir: Path) -> bool:
+    return all((dataset_dir(option_dir) / f"{name}.npy").exists() for name in ARRAY_NAMES)
+
+
+def save_dataset(option_dir: Path, vectors: list, a_max: int, problems: list) -> None:
+    # problems are (vector number, vector, target, ratio) as read by import_csv from the CSV problem list
+    path = dataset_dir(option_dir)
+    path.mkdir(exist_ok=True, parents=True)
+
+    arrays = {
+        "vectors": np.array(vectors, dtype=np.int64),
+        "vector_indices": np.arange(1, len(vectors) + 1, dtype=np.int64),
+        "a_max": np.array(a_max, dtype=np.int64),
+        "problem_indices": np.arange(1, len(problems) + 1, dtype=np.int64),
+        "problem_vectors": np.array([p[0] for p in problems], dtype=np.int64),
+        "targets": np.array([p[2] for p in problems], dtype=np.int64),
+        # Same precision as the CSV column, so both formats load identical problems
+        "ratios": np.array([round(p[3], 2) for p in problems], dtype=np.float64),
+    }
+    for name, array in arrays.items():
+        np.save(path / f"{name}.npy", array)
+
+
+def create_dataset(option_dir: Path, vectors_count: int, n: int, problems_count: int, a_max: int) -> dict:
+    # Arrays are written into a staging directory, so a partly generated dataset is never picked up by the loaders
+    path = option_dir / f"{DATASET_DIR_NAME}.tmp"
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+
+    shapes = {
+        "vectors": ((vectors_count, n), np.int64),
+        "vector_indices": ((vectors_count,), np.int64),
+        "a_max": ((), np.int64),
+        "problem_indices": ((problems_count,), np.int64),
+        "problem_vectors": ((problems_count,), np.int64),
+        "targets": ((problems_count,), np.int64),
+        "ratios": ((problems_count,), np.float64),
+    }
+    arrays = {
+        name: open_memmap(path / f"{name}.npy", mode="w+", dtype=dtype, shape=shape)
+        for name, (shape, dtype) in shapes.items()
+    }
+    arrays["a_max"][...] = a_max
+    return arrays
+
+
+def finish_dataset(option_dir: Path, arrays: dict) -> None:
+    for array in arrays.values():
+        array.flush()
+    arrays.clear()
+
+    path = dataset_dir(option_dir)
+    shutil.rmtree(path, ignore_errors=True)
+    (option_dir / f"{DATASET_DIR_NAME}.tmp").rename(path)
+
+
+def load_arrays(option_dir: Path) -> dict:
+    path = dataset_dir(option_dir)
+    return {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in ARRAY_NAMES}
+
+
+def load_vectors(option_dir: Path) -> dict:
+    arrays = load_arrays(option_dir)
+    return dict(zip(arrays["vector_indices"].tolist(), arrays["vectors"].tolist()))
+
+
+def load_problems(option_dir: Path) -> list:
+    arrays = load_arrays(option_dir)
+    return list(
+        zip(
+            arrays["problem_indices"].tolist(),
+            arrays["problem_vectors"].tolist(),
+            arrays["targets"].tolist(),
+            arrays["ratios"].tolist(),
+        )
+    )
+
+
+def export_csv(option_dir: Path) -> None:
+    arrays = load_arrays(option_dir)
+    a_max = int(arrays["a_max"])
+
+    with open(option_dir / "knapsack_vectors.csv", "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerow(["Номер вектора", "Вектор", "a_max"])
+        for vector_idx, vector in zip(arrays["vector_indices"].tolist(), arrays["vectors"].tolist()):
+            writer.writerow([vector_idx, vector, a_max])
+
+    with open(option_dir / "knapsack_problems.csv", "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerow(["Номер задачи", "Номер вектора", "Целевой вес", "Доля предметов"])
+        for problem in load_problems(option_dir):
+            writer.writerow([problem[0], problem[1], problem[2], "%.2f" % problem[3]])
+
+
+def import_csv(option_dir: Path) -> None:
+    vectors = []
+    a_max = 0
+    with open(option_dir / "knapsack_vectors.csv", "r", newline="") as csvfile:
+        reader = csv.reader(csvfile, delimiter=",")
+        next(reader)
+        for row in reader:
+            vectors.append(ast.literal_eval(row[1]))
+            a_max = int(row[2])
+
+    problems = []
+    with open(option_dir / "knapsack_problems.csv", "r", newline="") as csvfile:
+        reader = csv.reader(csvfile, delimiter=",")
+        next(reader)
+        for row in reader:
+            vector_idx = int(row[1])
+            problems.append((vector_idx, vectors[vector_idx - 1], int(row[2]), float(row[3])))
+
+    save_dataset(option_dir, vectors, a_max, problems)
+
+
+def main() -> None:
+    # Converts datasets generated before the binary format existed
+    for option_dir in sorted(BASE_DIR.glob("option*")):
+        if (option_dir / "knapsack_vectors.csv").exists() and not has_dataset(option_dir):
+            import_csv(option_dir)
+            logging.info("Converted %s to the binary dataset format", option_dir)
+
+
+if __name__ == "__main__":
+    main()
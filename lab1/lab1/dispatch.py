@@ -0,0 +1,102 @@
+import csv
+import logging
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bruteforce import VARIANTS, brute_force_solve, load_problems, load_vectors
+from dp import dp_solve
+from generate import calculate_a_max
+from subset_index import build_tables, count_in_tables, enumerate_in_tables
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+BASE_DIR = Path("data")
+# Costs are in vectorized element operations; a pure Python loop step is this many times slower
+PYTHON_OP_FACTOR = 50
+# Upper bound on n * table size for the DP reconstruction layers (one byte per cell)
+DP_MAX_CELLS = 200_000_000
+
+
+def estimate_costs(n: int, a_max: int, use_modulo: bool, target: int | None = None) -> dict:
+    if use_modulo:
+        dp_size = a_max + 1
+    else:
+        max_target = n * a_max if target is None else target
+        dp_size = min(max_target, n * a_max) + 1
+
+    # Building the half tables takes half * 2^half steps, sorting and querying them twice that.
+    # The half tables hold int64 sums, so the engine is ruled out once sums may leave that range
+    half = n - n // 2
+    return {
+        "enumeration": PYTHON_OP_FACTOR * n * 2**n,
+        "meet_in_the_middle": 3 * half * 2**half if n * a_max <= np.iinfo(np.int64).max else math.inf,
+        "dp": n * dp_size if n * dp_size <= DP_MAX_CELLS else math.inf,
+    }
+
+
+def select_engine(n: int, a_max: int, use_modulo: bool, target: int | None = None) -> str:
+    costs = estimate_costs(n, a_max, use_modulo, target)
+    return min(costs, key=costs.get)
+
+
+def solve_with_engine(engine: str, vector: list, target: int, use_modulo: bool) -> tuple:
+    if engine == "dp":
+        return dp_solve(vector, target, use_modulo)
+
+    if engine == "meet_in_the_middle":
+        tables = build_tables(vector, use_modulo)
+        count = count_in_tables(tables, target)
+        if count == 0:
+            return 0, None
+        return count, int(enumerate_in_tables(tables, target)[0])
+
+    _, _, count, mask = brute_force_solve(vector, target, use_modulo)
+    return count, mask
+
+
+def solve(vector: list, target: int, use_modulo: bool, a_max: int) -> tuple:
+    engine = select_engine(len(vector), a_max, use_modulo, target)
+    start_time = time.time()
+    count, mask = solve_with_engine(engine, vector, target, use_modulo)
+    return engine, time.time() - start_time, count, mask
+
+
+def solve_for_variant(variant_num: int) -> None:
+    variant = next((v for v in VARIANTS if v["number"] == variant_num), None)
+    if not variant:
+        logging.error(f"Invalid variant number: {variant_num}")
+        return
+
+    option_dir = BASE_DIR / f"option{variant_num}"
+    a_max = calculate_a_max(variant["n"], variant["divider"])
+    vectors = load_vectors(option_dir / "knapsack_vectors.csv")
+    problems = load_problems(option_dir / "knapsack_problems.csv")
+
+    with open(option_dir / "dispatch_results.csv", "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerow(["Номер задачи", "Метод решения", "Время нахождения всех решений", "Число решений"])
+        # The engine depends on the target, so the problems of one variant may be split between engines
+        engine_counts = {}
+        for problem_idx, vector_idx, target, _ in problems:
+            engine, time_used, count, _ = solve(vectors[vector_idx], target, variant["modulo"], a_max)
+            writer.writerow([problem_idx, engine, "%.6f" % time_used, count])
+            engine_counts[engine] = engine_counts.get(engine, 0) + 1
+
+    logging.info(
+        "Solved %d problems of variant %d: %s",
+        len(problems),
+        variant_num,
+        ", ".join(f"{engine} {count}" for engine, count in sorted(engine_counts.items())) or "none",
+    )
+
+
+def main() -> None:
+    for variant in VARIANTS:
+        solve_for_variant(variant["number"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def dp_table_size(vector: list, target: int, use_modulo: bool) -> int:
+    if use_modulo:
+        return max(vector) + 1
+    return min(target, sum(vector)) + 1
+
+
+def count_layers(vector: list, target: int, use_modulo: bool) -> tuple:
+    size = dp_table_size(vector, target, use_modulo)
+    counts = np.zeros(size, dtype=np.int64)
+    counts[0] = 1
+
+    # layers[i] marks the sums reachable with the first i items, used to reconstruct a solution
+    layers = [counts > 0]
+    for v in vector:
+        if use_modulo:
+            counts = counts + np.roll(counts, v % size)
+        elif v < size:
+            counts = counts.copy()
+            counts[v:] += counts[:-v]
+        layers.append(counts > 0)
+    return counts, layers
+
+
+def reconstruct(vector: list, layers: list, target: int, use_modulo: bool) -> int:
+    size = len(layers[0])
+    mask = 0
+    remaining = target
+    for i in range(len(vector) - 1, -1, -1):
+        previous = (remaining - vector[i]) % size if use_modulo else remaining - vector[i]
+        # Taking items whenever possible keeps the reconstructed subset non-empty for zero targets
+        if 0 <= previous < size and layers[i][previous]:
+            mask |= 1 << i
+            remaining = previous
+    return mask
+
+
+def dp_solve(vector: list, target: int, use_modulo: bool) -> tuple:
+    if use_modulo:
+        target = target % (max(vector) + 1)
+    elif target > sum(vector):
+        return 0, None
+
+    counts, layers = count_layers(vector, target, use_modulo)
+    # The empty subset is counted by the DP but is never a solution, as in brute_force_solve
+    count = int(counts[target]) - (1 if target == 0 else 0)
+    if count == 0:
+        return 0, None
+    return count, reconstruct(vector, layers, target, use_modulo)
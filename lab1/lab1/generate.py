@@ -3,23 +3,34 @@ import csv
 import logging
 from pathlib import Path
 
+import numpy as np
+
+import dataset
+import scheduler
+
 BASE_DIR = Path("data")
 N = 24
 VECTORS_COUNT = 50
 PROBLEMS_PER_VECTOR = 10
 MIN_RATIO = 0.1
 MAX_RATIO = 0.5
+SEED = 20240901
+# Weights generated per chunk (vectors times problems times n); together with SEED it fixes the generated data
+CHUNK_ELEMENTS = 2**22
+# Stress datasets of millions of problems can skip the CSV view and keep only the binary dataset
+WRITE_CSV = True
+GENERATION_TIME_LIMIT_SECONDS = 24 * 3600
 
 # Table of variants
 VARIANTS = [
-    {"number": 1, "n": 24, "divider": 0.8, "modulo": False},
-    {"number": 2, "n": 24, "divider": 1.0, "modulo": False},
-    {"number": 3, "n": 24, "divider": 1.2, "modulo": False},
-    {"number": 4, "n": 24, "divider": 1.4, "modulo": False},
-    {"number": 5, "n": 24, "divider": 0.8, "modulo": True},
-    {"number": 6, "n": 24, "divider": 1.0, "modulo": True},
-    {"number": 7, "n": 24, "divider": 1.2, "modulo": True},
-    {"number": 8, "n": 24, "divider": 1.4, "modulo": True},
+    {"number": 1, "n": N, "divider": 0.8, "modulo": False},
+    {"number": 2, "n": N, "divider": 1.0, "modulo": False},
+    {"number": 3, "n": N, "divider": 1.2, "modulo": False},
+    {"number": 4, "n": N, "divider": 1.4, "modulo": False},
+    {"number": 5, "n": N, "divider": 0.8, "modulo": True},
+    {"number": 6, "n": N, "divider": 1.0, "modulo": True},
+    {"number": 7, "n": N, "divider": 1.2, "modulo": True},
+    {"number": 8, "n": N, "divider": 1.4, "modulo": True},
 ]
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -33,16 +44,36 @@ def generate_knapsack_vector(n: int, a_max: int) -> list:
     return [random.randint(1, a_max) for _ in range(n)]
 
 
-def generate_multiple_vectors(n: int, a_max: int, count: int) -> list:
-    return [generate_knapsack_vector(n, a_max) for _ in range(count)]
+def check_value_range(n: int, a_max: int) -> None:
+    # Targets are sums of up to n weights and must fit the int64 dataset arrays
+    if n * a_max > np.iinfo(np.int64).max:
+        raise ValueError(f"Weights up to a_max={a_max} for n={n} do not fit into int64 targets")
+
+
+def chunk_rng(variant_num: int, chunk_idx: int) -> np.random.Generator:
+    # Every chunk has its own seed stream, so output depends only on SEED and the chunk layout, not on worker order
+    return np.random.default_rng(np.random.SeedSequence(SEED, spawn_key=(variant_num, chunk_idx)))
+
+
+def vectors_per_chunk(n: int, problems_per_vector: int) -> int:
+    return max(1, CHUNK_ELEMENTS // (n * problems_per_vector))
+
+
+def generate_vector_batch(rng: np.random.Generator, n: int, a_max: int, count: int) -> np.ndarray:
+    return rng.integers(1, a_max, size=(count, n), dtype=np.int64, endpoint=True)
 
 
 def save_vectors_to_file(vectors: list, a_max: int, path: Path) -> None:
     with open(path, "w", newline="") as csvfile:
         writer = csv.writer(csvfile, delimiter=",")
         writer.writerow(["Номер вектора", "Вектор", "a_max"])
-        for i, vector in enumerate(vectors, 1):
-            writer.writerow([i, vector, a_max])
+    append_vectors_to_file(vectors, a_max, path, 1)
+
+
+def append_vectors_to_file(vectors: list, a_max: int, path: Path, start: int) -> None:
+    with open(path, "a", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerows([i, vector, a_max] for i, vector in enumerate(vectors, start))
 
 
 def generate_knapsack_problem(vector: list, min_ratio: float, max_ratio: float) -> tuple:
@@ -55,46 +86,83 @@ def generate_knapsack_problem(vector: list, min_ratio: float, max_ratio: float)
     return (vector, target_weight, ratio)
 
 
-def generate_problems_for_vector(vector: list, num_problems: int) -> list:
-    return [generate_knapsack_problem(vector, MIN_RATIO, MAX_RATIO) for _ in range(num_problems)]
+def generate_problem_batch(
+    rng: np.random.Generator, vectors: np.ndarray, problems_per_vector: int, min_ratio: float, max_ratio: float
+) -> tuple:
+    count, n = vectors.shape
+    rows = np.repeat(np.arange(count), problems_per_vector)
+    num_items = rng.integers(int(n * min_ratio), int(n * max_ratio), size=rows.size, endpoint=True)
 
+    # The items with the num_items smallest random keys form a uniformly random subset of that size
+    order = np.argsort(rng.random((rows.size, n)), axis=1)
+    selected = np.zeros((rows.size, n), dtype=bool)
+    np.put_along_axis(selected, order, np.arange(n) < num_items[:, None], axis=1)
 
-def generate_all_problems(vectors: list, problems_per_vector: int) -> list:
-    all_problems = []
-    for i, vector in enumerate(vectors):
-        problems = generate_problems_for_vector(vector, problems_per_vector)
-        for problem in problems:
-            all_problems.append((i + 1, problem[0], problem[1], problem[2]))
-    return all_problems
+    targets = np.where(selected, vectors[rows], 0).sum(axis=1)
+    return rows, targets, num_items / n
 
 
 def save_problems_to_file(problems: list, path: Path) -> None:
     with open(path, "w", newline="") as csvfile:
         writer = csv.writer(csvfile, delimiter=",")
         writer.writerow(["Номер задачи", "Номер вектора", "Целевой вес", "Доля предметов"])
-        for i, (vector_num, _, target, ratio) in enumerate(problems, 1):
-            writer.writerow([i, vector_num, target, "%.2f" % ratio])
+    append_problems_to_file([(vector_num, target, ratio) for vector_num, _, target, ratio in problems], path, 1)
+
+
+def append_problems_to_file(problems: list, path: Path, start: int) -> None:
+    with open(path, "a", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerows(
+            [i, vector_num, target, "%.2f" % ratio] for i, (vector_num, target, ratio) in enumerate(problems, start)
+        )
 
 
-def generate_for_variant(variant: dict) -> None:
+def generate_for_variant(variant: dict) -> int:
     variant_num = variant["number"]
     n = variant["n"]
     divider = variant["divider"]
     a_max = calculate_a_max(n, divider)
+    check_value_range(n, a_max)
 
     # Create directory for this variant
     option_dir = BASE_DIR / f"option{variant_num}"
     option_dir.mkdir(exist_ok=True, parents=True)
 
-    # Generate and save vectors
-    vectors = generate_multiple_vectors(n, a_max, VECTORS_COUNT)
+    problems_count = VECTORS_COUNT * PROBLEMS_PER_VECTOR
+    arrays = dataset.create_dataset(option_dir, VECTORS_COUNT, n, problems_count, a_max)
     vectors_path = option_dir / "knapsack_vectors.csv"
-    save_vectors_to_file(vectors, a_max, vectors_path)
-
-    # Generate and save problems
-    all_problems = generate_all_problems(vectors, PROBLEMS_PER_VECTOR)
     problems_path = option_dir / "knapsack_problems.csv"
-    save_problems_to_file(all_problems, problems_path)
+    if WRITE_CSV:
+        save_vectors_to_file([], a_max, vectors_path)
+        save_problems_to_file([], problems_path)
+
+    # Vectors and their problems are generated and written chunk by chunk, so memory does not grow with the dataset
+    chunk_size = vectors_per_chunk(n, PROBLEMS_PER_VECTOR)
+    for chunk_idx, first in enumerate(range(0, VECTORS_COUNT, chunk_size)):
+        rng = chunk_rng(variant_num, chunk_idx)
+        last = min(first + chunk_size, VECTORS_COUNT)
+        vectors = generate_vector_batch(rng, n, a_max, last - first)
+        rows, targets, ratios = generate_problem_batch(rng, vectors, PROBLEMS_PER_VECTOR, MIN_RATIO, MAX_RATIO)
+
+        vector_nums = np.arange(first + 1, last + 1)
+        problem_nums = np.arange(first * PROBLEMS_PER_VECTOR + 1, last * PROBLEMS_PER_VECTOR + 1)
+        problems = slice(problem_nums[0] - 1, problem_nums[-1])
+        arrays["vectors"][first:last] = vectors
+        arrays["vector_indices"][first:last] = vector_nums
+        arrays["problem_indices"][problems] = problem_nums
+        arrays["problem_vectors"][problems] = vector_nums[rows]
+        arrays["targets"][problems] = targets
+        arrays["ratios"][problems] = np.round(ratios, 2)
+
+        if WRITE_CSV:
+            append_vectors_to_file(vectors.tolist(), a_max, vectors_path, first + 1)
+            chunk_problems = zip(vector_nums[rows].tolist(), targets.tolist(), ratios.tolist())
+            append_problems_to_file(list(chunk_problems), problems_path, first * PROBLEMS_PER_VECTOR + 1)
+
+    dataset.finish_dataset(option_dir, arrays)
+    if not WRITE_CSV:
+        vectors_path.unlink(missing_ok=True)
+        problems_path.unlink(missing_ok=True)
 
     logging.info(
         "Generated data for variant %d: n=%d, divider=%.1f, a_max=%d, modulo=%s, vectors=%d, problems=%d",
@@ -104,14 +172,24 @@ def generate_for_variant(variant: dict) -> None:
         a_max,
         "yes" if variant["modulo"] else "no",
         VECTORS_COUNT,
-        len(all_problems),
+        problems_count,
     )
+    return problems_count
+
+
+def generate_variants(variants: list) -> int:
+    # Variants are independent seed streams, so they are generated in parallel without changing the output
+    tasks = [
+        (variant["n"] * VECTORS_COUNT * PROBLEMS_PER_VECTOR, generate_for_variant, variant) for variant in variants
+    ]
+    problems_count = sum(scheduler.run_tasks(tasks, time_limit=GENERATION_TIME_LIMIT_SECONDS))
+    scheduler.shutdown()
+    return problems_count
 
 
 def main() -> None:
-    for variant in VARIANTS:
-        generate_for_variant(variant)
-    logging.info("Data generation completed for all variants")
+    problems_count = generate_variants(VARIANTS)
+    logging.info("Data generation completed for all variants: %d problems", problems_count)
 
 
 if __name__ == "__main__":
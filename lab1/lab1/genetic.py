@@ -1,24 +1,64 @@
 import ast
 import csv
-import fcntl
+import json
 import logging
+import math
 import multiprocessing
+import os
 import random
+import signal
 import time
 from pathlib import Path
 
 import numpy as np
 
+import aggregator
+import dataset
+import limbs
+import scheduler
+import shared
+import store
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 BASE_DIR = Path("data")
-NUM_PROCESSES = 15
+MODULO_COST_FACTOR = 2.0
+# Load vectors and problems into shared memory once and send workers only (variant, row) indices
+SHARED_MEMORY = True
+RESULTS_HEADER = [
+    "Номер задачи",
+    "Время работы алгортима",
+    "Достигнутый минимум фитнесс-функции",
+    "Причина остановки алгоритма",
+    "Номер последнего поколения",
+]
 POPULATION_SIZE = 200
 MUTATION_RATE = 0.2
 CROSSOVER_RATE = 0.8
 TOURNAMENT_SIZE = 5
 MAX_GENERATIONS = 1000
 MAX_TIME_SECONDS = 300
+# "vectorized" evolves the population as a NumPy bit matrix, "packed" stores each chromosome in one uint32
+# (falling back to "vectorized" above PACKED_MAX_N items), "scalar" keeps chromosomes as Python lists
+ENGINE = "vectorized"
+PACKED_MAX_N = 32
+# None solves every problem as its own task; "vector" or "variant" evolves all problems of a group in one tensor.
+# The batched engine only draws uniform populations, so it cannot be combined with WARM_START, INITIALIZATION or REPAIR
+BATCH_MODE = None
+# Seed the vectorized engine from a per-vector archive of good chromosomes found on earlier targets
+WARM_START = False
+WARM_START_ARCHIVE_SIZE = 100
+WARM_START_FRACTION = 0.5
+# "uniform" draws random bits, "ratio" sets each bit with the problem's item ratio, "greedy" also seeds
+# GREEDY_SEED_FRACTION of the population with randomized greedy fills of the target
+INITIALIZATION = "uniform"
+GREEDY_SEED_FRACTION = 0.5
+# Flip the single item that brings each new chromosome closest to the target
+REPAIR = False
+# The vectorized engine snapshots its state this often, and on SIGTERM, so an interrupted run resumes where it stopped
+CHECKPOINT = True
+CHECKPOINT_SECONDS = 30
+CHECKPOINT_DIR_NAME = "checkpoints"
 
 # Table of variants
 VARIANTS = [
@@ -32,8 +72,17 @@ VARIANTS = [
     {"number": 8, "n": 24, "divider": 1.4, "modulo": True},
 ]
 
+# Warm start archives of the current worker process, keyed by vector
+_archives = {}
+# Set by SIGTERM; a running GA checkpoints after its current generation and exits
+_preempted = False
+_running = False
+
 
 def load_problems(path: Path) -> list:
+    if dataset.has_dataset(path.parent):
+        return dataset.load_problems(path.parent)
+
     problems = []
     with open(path, "r", newline="") as csvfile:
         reader = csv.reader(csvfile, delimiter=",")
@@ -48,6 +97,9 @@ def load_problems(path: Path) -> list:
 
 
 def load_vectors(path: Path) -> dict:
+    if dataset.has_dataset(path.parent):
+        return dataset.load_vectors(path.parent)
+
     vectors = {}
     with open(path, "r", newline="") as csvfile:
         reader = csv.reader(csvfile, delimiter=",")
@@ -60,28 +112,7 @@ def load_vectors(path: Path) -> dict:
 
 
 def load_existing_results(path: Path) -> set:
-    if not path.exists():
-        with open(path, "w", newline="") as csvfile:
-            writer = csv.writer(csvfile, delimiter=",")
-            writer.writerow(
-                [
-                    "Номер задачи",
-                    "Время работы алгортима",
-                    "Достигнутый минимум фитнесс-функции",
-                    "Причина остановки алгоритма",
-                    "Номер последнего поколения",
-                ]
-            )
-        return set()
-
-    solved_problems = set()
-    with open(path, "r", newline="") as csvfile:
-        reader = csv.reader(csvfile, delimiter=",")
-        next(reader)
-        for row in reader:
-            if row:
-                solved_problems.add(int(row[0]))
-    return solved_problems
+    return store.load_results(path, RESULTS_HEADER)
 
 
 def fitness_function(chromosome: list, vector: list, target: int, use_modulo: bool) -> int:
@@ -145,11 +176,25 @@ def evolve_population(population: list, fitnesses: list) -> list:
 def estimate_max_time(vector: list, target: int) -> float:
     n = len(vector)
     max_weight = max(vector)
-    complexity = n * max_weight * np.log(target + 1)
+    complexity = n * max_weight * np.log(float(target + 1))
     return min(MAX_TIME_SECONDS, complexity / 10000)
 
 
-def genetic_algorithm(vector: list, target: int, use_modulo: bool) -> tuple:
+def check_stop(best_fitness_history: list, generation: int, start_time: float, max_time_limit: float) -> str | None:
+    if best_fitness_history[-1] == 0:
+        return "Найдено точное решение"
+
+    min_generations = int(MAX_GENERATIONS * 0.5)
+    if generation >= min_generations and generation > 0 and best_fitness_history[-1] == best_fitness_history[-2]:
+        return "Нет улучшений на последних двух итерациях"
+
+    if time.time() - start_time > max_time_limit:
+        return "Превышено время работы"
+
+    return None
+
+
+def genetic_algorithm_scalar(vector: list, target: int, use_modulo: bool) -> tuple:
     start_time = time.time()
     n = len(vector)
     population = initialize_population(POPULATION_SIZE, n)
@@ -167,17 +212,8 @@ def genetic_algorithm(vector: list, target: int, use_modulo: bool) -> tuple:
         best_chromosome = population[min_idx]
         best_fitness_history.append(min_fitness)
 
-        if min_fitness == 0:
-            stop_reason = "Найдено точное решение"
-            break
-
-        min_generations = int(MAX_GENERATIONS * 0.5)
-        if generation >= min_generations and generation > 0 and best_fitness_history[-1] == best_fitness_history[-2]:
-            stop_reason = "Нет улучшений на последних двух итерациях"
-            break
-
-        if time.time() - start_time > max_time_limit:
-            stop_reason = "Превышено время работы"
+        stop_reason = check_stop(best_fitness_history, generation, start_time, max_time_limit)
+        if stop_reason:
             break
 
         population = evolve_population(population, fitnesses)
@@ -192,20 +228,497 @@ def genetic_algorithm(vector: list, target: int, use_modulo: bool) -> tuple:
     return total_time, min_fitness, stop_reason, generation
 
 
+def fitness_matrix(population: np.ndarray, weights: np.ndarray, target: int, modulo: int) -> np.ndarray:
+    total_weights = population @ weights
+    if modulo:
+        return np.abs(target % modulo - total_weights % modulo)
+    return np.abs(target - total_weights)
+
+
+def tournament_winners(fitnesses: np.ndarray, rng: np.random.Generator) -> tuple:
+    pairs = POPULATION_SIZE // 2
+    # Contestants are drawn with replacement; with TOURNAMENT_SIZE << pop_size this matches random.sample closely
+    contestants = rng.integers(0, len(fitnesses), (2 * pairs, TOURNAMENT_SIZE))
+    winners = contestants[np.arange(2 * pairs), np.argmin(fitnesses[contestants], axis=1)]
+    return winners[0::2], winners[1::2]
+
+
+def evolve_population_matrix(population: np.ndarray, fitnesses: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    n = population.shape[1]
+    first, second = tournament_winners(fitnesses, rng)
+    parent1 = population[first]
+    parent2 = population[second]
+
+    points = rng.integers(1, n, len(first))
+    skip_crossover = rng.random(len(first)) > CROSSOVER_RATE
+    from_first = (np.arange(n) < points[:, None]) | skip_crossover[:, None]
+
+    children = np.empty((2 * len(first), n), dtype=np.uint8)
+    children[0::2] = np.where(from_first, parent1, parent2)
+    children[1::2] = np.where(from_first, parent2, parent1)
+
+    children ^= (rng.random(children.shape) < MUTATION_RATE).astype(np.uint8)
+    return children
+
+
+def byte_tables(vector: list) -> np.ndarray:
+    # tables[b][x] is the weight of the items selected by byte value x at bits 8b..8b+7 of a packed chromosome
+    num_bytes = (len(vector) + 7) // 8
+    byte_values = np.arange(256)
+    tables = np.zeros((num_bytes, 256), dtype=np.int64)
+    for i, v in enumerate(vector):
+        tables[i // 8] += ((byte_values >> (i % 8)) & 1) * v
+    return tables
+
+
+def fitness_packed(population: np.ndarray, tables: np.ndarray, target: int, modulo: int) -> np.ndarray:
+    total_weights = tables[0][population & 0xFF]
+    for b in range(1, len(tables)):
+        total_weights = total_weights + tables[b][(population >> (8 * b)) & 0xFF]
+    if modulo:
+        return np.abs(target % modulo - total_weights % modulo)
+    return np.abs(target - total_weights)
+
+
+def evolve_population_packed(
+    population: np.ndarray, fitnesses: np.ndarray, rng: np.random.Generator, n: int
+) -> np.ndarray:
+    first, second = tournament_winners(fitnesses, rng)
+    parent1 = population[first]
+    parent2 = population[second]
+
+    # Bit i of a packed chromosome is gene i, so the genes before the crossover point are the low bits
+    points = rng.integers(1, n, len(first)).astype(np.uint32)
+    low_bits = (np.uint32(1) << points) - np.uint32(1)
+    low_bits[rng.random(len(first)) > CROSSOVER_RATE] = np.uint32((1 << n) - 1)
+
+    children = np.empty(2 * len(first), dtype=np.uint32)
+    children[0::2] = (parent1 & low_bits) | (parent2 & ~low_bits)
+    children[1::2] = (parent2 & low_bits) | (parent1 & ~low_bits)
+
+    flips = rng.random((len(children), n)) < MUTATION_RATE
+    children ^= flips.astype(np.uint32) @ (np.uint32(1) << np.arange(n, dtype=np.uint32))
+    return children
+
+
+def evolve_generations(
+    population: np.ndarray,
+    evaluate,
+    evolve,
+    start_time: float,
+    max_time_limit: float,
+    generation: int = 0,
+    best_fitness_history: list | None = None,
+    on_generation=None,
+) -> tuple:
+    # generation and best_fitness_history continue a resumed run; on_generation sees every new population
+    best_fitness_history = [] if best_fitness_history is None else best_fitness_history
+
+    while generation < MAX_GENERATIONS:
+        fitnesses = evaluate(population)
+        best_fitness_history.append(int(fitnesses.min()))
+
+        stop_reason = check_stop(best_fitness_history, generation, start_time, max_time_limit)
+        if stop_reason:
+            break
+
+        evaluated = population
+        population = evolve(population, fitnesses)
+        generation += 1
+        if on_generation is not None and generation < MAX_GENERATIONS:
+            on_generation(population, generation, best_fitness_history)
+
+    else:
+        stop_reason = "Достигнуто максимальное число поколений"
+        population = evaluated
+
+    return best_fitness_history[-1], stop_reason, generation, population, fitnesses
+
+
+def greedy_fill(weights: np.ndarray, target: int, count: int, rng: np.random.Generator) -> np.ndarray:
+    # Items are taken heaviest first by a noisy weight, so every call yields a different near-target subset
+    keys = weights * rng.uniform(0.5, 1.5, (count, len(weights)))
+    order = np.argsort(-keys, axis=1)
+    rows = np.arange(count)
+
+    population = np.zeros((count, len(weights)), dtype=np.uint8)
+    totals = np.zeros(count, dtype=np.int64)
+    for j in range(len(weights)):
+        items = order[:, j]
+        fits = totals + weights[items] <= target
+        population[rows[fits], items[fits]] = 1
+        totals[fits] += weights[items[fits]]
+    return population
+
+
+def seed_population(
+    archive: np.ndarray | None,
+    rng: np.random.Generator,
+    weights: np.ndarray,
+    target: int,
+    modulo: int,
+    ratio: float | None,
+) -> np.ndarray:
+    n = len(weights)
+    if INITIALIZATION in ("ratio", "greedy") and ratio is not None:
+        population = (rng.random((POPULATION_SIZE, n)) < ratio).astype(np.uint8)
+    else:
+        population = rng.integers(0, 2, (POPULATION_SIZE, n), dtype=np.uint8)
+
+    if INITIALIZATION == "greedy":
+        count = int(POPULATION_SIZE * GREEDY_SEED_FRACTION)
+        population[:count] = greedy_fill(weights, target % modulo if modulo else target, count, rng)
+
+    if archive is not None:
+        count = min(len(archive), int(POPULATION_SIZE * WARM_START_FRACTION))
+        population[:count] = archive[rng.choice(len(archive), count, replace=False)]
+    return population
+
+
+def repair(population: np.ndarray, weights: np.ndarray, target: int, modulo: int) -> np.ndarray:
+    total_weights = population @ weights
+    deltas = np.where(population == 1, -weights, weights)
+    if modulo:
+        current = np.abs(target % modulo - total_weights % modulo)
+        flipped = np.abs(target % modulo - (total_weights[:, None] + deltas) % modulo)
+    else:
+        current = np.abs(target - total_weights)
+        flipped = np.abs(target - (total_weights[:, None] + deltas))
+
+    best_items = np.argmin(flipped, axis=1)
+    rows = np.nonzero(flipped[np.arange(len(population)), best_items] < current)[0]
+    population[rows, best_items[rows]] ^= 1
+    return population
+
+
+def update_archive(archive: np.ndarray | None, population: np.ndarray, fitnesses: np.ndarray) -> np.ndarray:
+    # Newest best chromosomes go first; duplicates are dropped so the archive stays diverse
+    best = population[np.argsort(fitnesses, kind="stable")[:WARM_START_ARCHIVE_SIZE]]
+    merged = best if archive is None else np.concatenate([best, archive])
+    _, first_seen = np.unique(merged, axis=0, return_index=True)
+    return merged[np.sort(first_seen)][:WARM_START_ARCHIVE_SIZE]
+
+
+def checkpoint_path(results_path: Path, problem_idx: int) -> Path:
+    return results_path.parent / CHECKPOINT_DIR_NAME / results_path.stem / f"problem{problem_idx}.npz"
+
+
+def save_checkpoint(
+    path: Path, population: np.ndarray, generation: int, elapsed: float, history: list, rng_state: dict
+) -> None:
+    # Written to a temporary file and renamed, so a kill during the write leaves the previous checkpoint intact
+    path.parent.mkdir(exist_ok=True, parents=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "wb") as checkpoint_file:
+        np.savez(
+            checkpoint_file,
+            population=population,
+            generation=generation,
+            elapsed=elapsed,
+            history=np.array(history, dtype=np.int64),
+            rng_state=json.dumps(rng_state),
+        )
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    with np.load(path) as checkpoint:
+        return {
+            "population": checkpoint["population"],
+            "generation": int(checkpoint["generation"]),
+            "elapsed": float(checkpoint["elapsed"]),
+            "history": checkpoint["history"].tolist(),
+            "rng_state": json.loads(str(checkpoint["rng_state"])),
+        }
+
+
+def handle_sigterm(signum, frame):
+    global _preempted
+    if not _running:
+        raise SystemExit(0)
+    _preempted = True
+
+
+def install_preemption_handler() -> None:
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
+def genetic_algorithm_vectorized(
+    vector: list, target: int, use_modulo: bool, ratio: float | None = None, checkpoint: Path | None = None
+) -> tuple:
+    global _running
+    start_time = time.time()
+    rng = np.random.default_rng()
+    weights = np.array(vector, dtype=np.int64)
+    modulo = max(vector) + 1 if use_modulo else 0
+    archive_key = tuple(vector)
+    archive = _archives.get(archive_key) if WARM_START else None
+
+    state = load_checkpoint(checkpoint) if checkpoint is not None else None
+    if state is not None:
+        # Shifting the start keeps the time limit and the reported time counting from the first attempt
+        start_time -= state["elapsed"]
+        rng.bit_generator.state = state["rng_state"]
+        population = state["population"]
+        logging.info("Resuming GA from generation %d of %s", state["generation"], checkpoint)
+    else:
+        population = seed_population(archive, rng, weights, target, modulo, ratio)
+        if REPAIR:
+            population = repair(population, weights, target, modulo)
+
+    def evolve(pop: np.ndarray, fitnesses: np.ndarray) -> np.ndarray:
+        children = evolve_population_matrix(pop, fitnesses, rng)
+        return repair(children, weights, target, modulo) if REPAIR else children
+
+    last_saved = time.time()
+
+    def on_generation(pop: np.ndarray, generation: int, history: list) -> None:
+        nonlocal last_saved
+        if _preempted or time.time() - last_saved >= CHECKPOINT_SECONDS:
+            save_checkpoint(checkpoint, pop, generation, time.time() - start_time, history, rng.bit_generator.state)
+            last_saved = time.time()
+        if _preempted:
+            raise SystemExit(0)
+
+    _running = True
+    try:
+        min_fitness, stop_reason, generation, population, fitnesses = evolve_generations(
+            population,
+            lambda pop: fitness_matrix(pop, weights, target, modulo),
+            evolve,
+            start_time,
+            estimate_max_time(vector, target),
+            state["generation"] if state else 0,
+            state["history"] if state else None,
+            on_generation if checkpoint is not None else None,
+        )
+    finally:
+        _running = False
+
+    if checkpoint is not None:
+        checkpoint.unlink(missing_ok=True)
+    if WARM_START:
+        _archives[archive_key] = update_archive(_archives.get(archive_key), population, fitnesses)
+    return time.time() - start_time, min_fitness, stop_reason, generation
+
+
+def genetic_algorithm_packed(vector: list, target: int, use_modulo: bool) -> tuple:
+    start_time = time.time()
+    rng = np.random.default_rng()
+    n = len(vector)
+    tables = byte_tables(vector)
+    modulo = max(vector) + 1 if use_modulo else 0
+    population = rng.integers(0, 1 << n, POPULATION_SIZE, dtype=np.uint32)
+
+    min_fitness, stop_reason, generation, _, _ = evolve_generations(
+        population,
+        lambda pop: fitness_packed(pop, tables, target, modulo),
+        lambda pop, fitnesses: evolve_population_packed(pop, fitnesses, rng, n),
+        start_time,
+        estimate_max_time(vector, target),
+    )
+    return time.time() - start_time, min_fitness, stop_reason, generation
+
+
+def fits_int64(vector: list, target: int) -> bool:
+    return max(sum(vector), target) <= np.iinfo(np.int64).max
+
+
+def fitness_limbs(
+    population: np.ndarray, weight_limbs: np.ndarray, target_limbs: np.ndarray, modulo: int, bound: int
+) -> np.ndarray:
+    total_weights = limbs.dot(population, weight_limbs)
+    if modulo:
+        total_weights = limbs.mod(total_weights, modulo, bound)
+    return limbs.absdiff(target_limbs, total_weights)
+
+
+def genetic_algorithm_limbs(vector: list, target: int, use_modulo: bool) -> tuple:
+    # Subset sums beyond int64 are evaluated exactly in multi-limb arithmetic instead of Python ints
+    start_time = time.time()
+    rng = np.random.default_rng()
+    modulo = max(vector) + 1 if use_modulo else 0
+    bound = sum(vector) + 1
+    width = limbs.limbs_needed(max(bound, target))
+    weight_limbs = limbs.to_limbs(vector, width)
+    target_limbs = limbs.to_limbs([target % modulo if modulo else target], width)[0]
+    population = rng.integers(0, 2, (POPULATION_SIZE, len(vector)), dtype=np.uint8)
+
+    # Selection only compares fitnesses, so their monotone float image ranks chromosomes like the exact values
+    _, stop_reason, generation, population, fitnesses = evolve_generations(
+        population,
+        lambda pop: limbs.to_float(fitness_limbs(pop, weight_limbs, target_limbs, modulo, bound)),
+        lambda pop, fitnesses: evolve_population_matrix(pop, fitnesses, rng),
+        start_time,
+        estimate_max_time(vector, target),
+    )
+
+    best = population[np.argmin(fitnesses)][None]
+    min_fitness = limbs.from_limbs(fitness_limbs(best, weight_limbs, target_limbs, modulo, bound))[0]
+    return time.time() - start_time, min_fitness, stop_reason, generation
+
+
+def select_engine(vector: list, target: int) -> str:
+    if not fits_int64(vector, target):
+        return "limbs"
+    # Warm start, biased initialization and repair are only implemented by the vectorized engine
+    if WARM_START or INITIALIZATION != "uniform" or REPAIR:
+        return "vectorized"
+    if ENGINE == "packed" and len(vector) <= PACKED_MAX_N:
+        return "packed"
+    if ENGINE in ("vectorized", "packed"):
+        return "vectorized"
+    return "scalar"
+
+
+def genetic_algorithm(
+    vector: list, target: int, use_modulo: bool, ratio: float | None = None, checkpoint: Path | None = None
+) -> tuple:
+    # Only the vectorized engine checkpoints; the other engines ignore checkpoint
+    engine = select_engine(vector, target)
+    if engine == "limbs":
+        return genetic_algorithm_limbs(vector, target, use_modulo)
+    if engine == "packed":
+        return genetic_algorithm_packed(vector, target, use_modulo)
+    if engine == "vectorized":
+        return genetic_algorithm_vectorized(vector, target, use_modulo, ratio, checkpoint)
+    return genetic_algorithm_scalar(vector, target, use_modulo)
+
+
+def check_engine_config() -> None:
+    # Called once per run in the main process, so the warning is not repeated by every worker and problem
+    features = [
+        name
+        for name, enabled in [
+            ("WARM_START", WARM_START),
+            ("INITIALIZATION", INITIALIZATION != "uniform"),
+            ("REPAIR", REPAIR),
+        ]
+        if enabled
+    ]
+    if BATCH_MODE and features:
+        # The batched engine draws uniform populations and never repairs, and warm start needs problems run in order
+        raise ValueError(f"BATCH_MODE={BATCH_MODE!r} cannot be combined with {', '.join(features)}")
+    if BATCH_MODE and ENGINE != "vectorized":
+        logging.warning(
+            "ENGINE=%r is not used: BATCH_MODE=%r evolves each group of problems with the batched engine",
+            ENGINE,
+            BATCH_MODE,
+        )
+    elif features and ENGINE != "vectorized":
+        logging.warning(
+            "ENGINE=%r is overridden by the vectorized engine, the only one implementing %s",
+            ENGINE,
+            ", ".join(features),
+        )
+
+
+def warn_without_checkpoints(variant_num: int, problems: list, vectors: dict) -> None:
+    # Interrupted runs of engines without checkpoints restart from generation 0 instead of resuming
+    engines = {}
+    for _, vector_idx, target, _ in problems:
+        if BATCH_MODE and fits_int64(vectors[vector_idx], target):
+            engine = "batched"
+        else:
+            engine = select_engine(vectors[vector_idx], target)
+        if engine != "vectorized":
+            engines[engine] = engines.get(engine, 0) + 1
+    if engines:
+        logging.warning(
+            "CHECKPOINT is on, but %s of variant %d cannot checkpoint; interrupted runs restart",
+            ", ".join(f"{count} problems on the {engine} engine" for engine, count in sorted(engines.items())),
+            variant_num,
+        )
+
+
+def fitness_batch(population: np.ndarray, weights: np.ndarray, targets: np.ndarray, moduli: np.ndarray) -> np.ndarray:
+    total_weights = (population @ weights[:, :, None])[:, :, 0]
+    if moduli.any():
+        return np.abs(targets[:, None] % moduli[:, None] - total_weights % moduli[:, None])
+    return np.abs(targets[:, None] - total_weights)
+
+
+def evolve_population_batch(population: np.ndarray, fitnesses: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    problems, pop_size, n = population.shape
+    pairs = POPULATION_SIZE // 2
+    rows = np.arange(problems)[:, None]
+
+    contestants = rng.integers(0, pop_size, (problems, 2 * pairs, TOURNAMENT_SIZE))
+    contestant_fitnesses = fitnesses[rows[:, :, None], contestants]
+    winners = np.take_along_axis(contestants, np.argmin(contestant_fitnesses, axis=2)[:, :, None], axis=2)[:, :, 0]
+    parent1 = population[rows, winners[:, 0::2]]
+    parent2 = population[rows, winners[:, 1::2]]
+
+    points = rng.integers(1, n, (problems, pairs))
+    skip_crossover = rng.random((problems, pairs)) > CROSSOVER_RATE
+    from_first = (np.arange(n) < points[:, :, None]) | skip_crossover[:, :, None]
+
+    children = np.empty((problems, 2 * pairs, n), dtype=np.uint8)
+    children[:, 0::2] = np.where(from_first, parent1, parent2)
+    children[:, 1::2] = np.where(from_first, parent2, parent1)
+
+    children ^= (rng.random(children.shape) < MUTATION_RATE).astype(np.uint8)
+    return children
+
+
+def genetic_algorithm_batched(vectors: list, targets: list, use_modulo: bool) -> list:
+    start_time = time.time()
+    rng = np.random.default_rng()
+    weights = np.array(vectors, dtype=np.int64)
+    moduli = np.array([max(v) + 1 if use_modulo else 0 for v in vectors], dtype=np.int64)
+    targets_array = np.array(targets, dtype=np.int64)
+    population = rng.integers(0, 2, (len(targets), POPULATION_SIZE, weights.shape[1]), dtype=np.uint8)
+    max_time_limits = [estimate_max_time(v, t) for v, t in zip(vectors, targets)]
+
+    best_fitness_histories = [[] for _ in targets]
+    results = [None] * len(targets)
+    active = np.arange(len(targets))
+    generation = 0
+
+    # Stopped problems are masked out of the tensor, the rest keep evolving with the same per-problem stop rules
+    while generation < MAX_GENERATIONS:
+        fitnesses = fitness_batch(population, weights[active], targets_array[active], moduli[active])
+        best_fitnesses = fitnesses.min(axis=1)
+
+        keep = np.ones(len(active), dtype=bool)
+        for i, problem in enumerate(active):
+            history = best_fitness_histories[problem]
+            history.append(int(best_fitnesses[i]))
+            stop_reason = check_stop(history, generation, start_time, max_time_limits[problem])
+            if stop_reason:
+                results[problem] = (time.time() - start_time, history[-1], stop_reason, generation)
+                keep[i] = False
+
+        active = active[keep]
+        if len(active) == 0:
+            break
+
+        population = evolve_population_batch(population[keep], fitnesses[keep], rng)
+        generation += 1
+
+    for problem in active:
+        history = best_fitness_histories[problem]
+        results[problem] = (
+            time.time() - start_time,
+            history[-1],
+            "Достигнуто максимальное число поколений",
+            generation,
+        )
+
+    return results
+
+
 def save_result_to_file(result: tuple, path: Path) -> None:
     problem_idx, time_used, min_fitness, stop_reason, last_gen = result
-    with open(path, "a", newline="") as csvfile:
-        fcntl.flock(csvfile, fcntl.LOCK_EX)
-        try:
-            writer = csv.writer(csvfile, delimiter=",")
-            writer.writerow([problem_idx, "%.6f" % time_used, min_fitness, stop_reason, last_gen])
-        finally:
-            fcntl.flock(csvfile, fcntl.LOCK_UN)
+    store.put(path, problem_idx, [problem_idx, "%.6f" % time_used, min_fitness, stop_reason, last_gen])
 
 
 def solve_single_problem(args: tuple) -> tuple:
     problem_idx, vector_idx, target, ratio, vector, use_modulo, results_path = args
-    time_used, min_fitness, stop_reason, generation = genetic_algorithm(vector, target, use_modulo)
+    checkpoint = checkpoint_path(results_path, problem_idx) if CHECKPOINT else None
+    time_used, min_fitness, stop_reason, generation = genetic_algorithm(vector, target, use_modulo, ratio, checkpoint)
 
     result = (problem_idx, time_used, min_fitness, stop_reason, generation)
     save_result_to_file(result, results_path)
@@ -219,32 +732,141 @@ def solve_single_problem(args: tuple) -> tuple:
     return result
 
 
+def solve_problem_group(group_args: list) -> list:
+    return [solve_single_problem(args) for args in group_args]
+
+
+def solve_problem_batch(args: tuple) -> list:
+    problems, vectors, use_modulo, results_path = args
+    batch_results = genetic_algorithm_batched(vectors, [p[2] for p in problems], use_modulo)
+
+    results = []
+    for problem, (time_used, min_fitness, stop_reason, generation) in zip(problems, batch_results):
+        result = (problem[0], time_used, min_fitness, stop_reason, generation)
+        save_result_to_file(result, results_path)
+        results.append(result)
+
+    logging.info(
+        "Solved %d problems with batched GA: %d exact, time=%.4f seconds",
+        len(problems),
+        sum(1 for r in results if r[2] == 0),
+        max(r[1] for r in results),
+    )
+    return results
+
+
+def group_problems(problems: list) -> list:
+    if BATCH_MODE == "variant":
+        return [problems]
+
+    groups = {}
+    for problem in problems:
+        groups.setdefault(problem[1], []).append(problem)
+    return list(groups.values())
+
+
+def estimate_task_cost(vector: list, target: int, use_modulo: bool) -> float:
+    # The GA time limit grows with a_max; modular problems are rarely solved exactly and usually run to the limit
+    cost = estimate_max_time(vector, target)
+    return cost * MODULO_COST_FACTOR if use_modulo else cost
+
+
+def task_time_limit(cost: float) -> int:
+    # A grouped task runs all its problems, so its limit grows with their summed cost instead of being one
+    # problem's; the factor 2 leaves room for the generation that overshoots each problem's own limit
+    return math.ceil(2 * max(cost, MAX_TIME_SECONDS))
+
+
+def single_task(problem: tuple, vectors: dict, use_modulo: bool, results_path: Path) -> tuple:
+    problem_idx, vector_idx, target, ratio = problem
+    return (
+        estimate_task_cost(vectors[vector_idx], target, use_modulo),
+        solve_single_problem,
+        (problem_idx, vector_idx, target, ratio, vectors[vector_idx], use_modulo, results_path),
+    )
+
+
+def build_tasks(problems: list, vectors: dict, solved_problems: set, use_modulo: bool, results_path: Path) -> list:
+    unsolved_problems = [p for p in problems if p[0] not in solved_problems]
+
+    if WARM_START:
+        # Problems of one vector run in order in the same worker so later targets reuse its archive
+        return [
+            (
+                sum(estimate_task_cost(vectors[p[1]], p[2], use_modulo) for p in group),
+                solve_problem_group,
+                [(p[0], p[1], p[2], p[3], vectors[p[1]], use_modulo, results_path) for p in group],
+            )
+            for group in group_problems(unsolved_problems)
+        ]
+
+    if BATCH_MODE:
+        # Batches evolve int64 tensors, so problems whose sums leave int64 run alone on the limbs engine
+        batched = [p for p in unsolved_problems if fits_int64(vectors[p[1]], p[2])]
+        return [
+            (
+                max(estimate_task_cost(vectors[p[1]], p[2], use_modulo) for p in group),
+                solve_problem_batch,
+                (group, [vectors[p[1]] for p in group], use_modulo, results_path),
+            )
+            for group in group_problems(batched)
+        ] + [
+            single_task(p, vectors, use_modulo, results_path)
+            for p in unsolved_problems
+            if not fits_int64(vectors[p[1]], p[2])
+        ]
+
+    return [single_task(p, vectors, use_modulo, results_path) for p in unsolved_problems]
+
+
 def solve_all_problems_parallel(
     problems: list, vectors: dict, solved_problems: set, use_modulo: bool, results_path: Path
 ) -> None:
-    unsolved_problems = [p for p in problems if p[0] not in solved_problems]
-    if not unsolved_problems:
+    check_engine_config()
+    tasks = build_tasks(problems, vectors, solved_problems, use_modulo, results_path)
+    if not tasks:
         logging.info("All problems already solved")
         return
 
-    problem_args = [(p[0], p[1], p[2], p[3], vectors[p[1]], use_modulo, results_path) for p in unsolved_problems]
-    logging.info("Starting %d processes for %d unsolved problems", NUM_PROCESSES, len(problem_args))
+    logging.info("Scheduling %d GA tasks", len(tasks))
+    scheduler.run_tasks(tasks, time_limit=task_time_limit)
 
-    with multiprocessing.Pool(processes=NUM_PROCESSES) as pool:
-        pool.map(solve_single_problem, problem_args)
 
+def results_filename() -> str:
+    suffixes = ["warm"] if WARM_START else []
+    if INITIALIZATION != "uniform":
+        suffixes.append(INITIALIZATION)
+    if REPAIR:
+        suffixes.append("repair")
+    return "_".join(["genetic_results"] + suffixes) + ".csv"
 
-def solve_for_variant(variant_num: int) -> None:
+
+def solve_shared_problem(task: tuple) -> tuple:
+    variant_num, row = task
+    problem_idx, vector_idx, target, ratio, vector = shared.load_problem(variant_num, row)
+    use_modulo = VARIANTS[variant_num - 1]["modulo"]
+    results_path = BASE_DIR / f"option{variant_num}" / results_filename()
+    return solve_single_problem((problem_idx, vector_idx, target, ratio, vector, use_modulo, results_path))
+
+
+def share_tasks(variant_num: int, tasks: list, descriptors: dict) -> list:
+    problems = [args[:4] for _, _, args in tasks]
+    vectors = {args[1]: args[4] for _, _, args in tasks}
+    descriptors[variant_num] = shared.share_variant(vectors, problems)
+    return [(cost, solve_shared_problem, (variant_num, row)) for row, (cost, _, _) in enumerate(tasks)]
+
+
+def collect_tasks(variant_num: int) -> list:
     variant = next((v for v in VARIANTS if v["number"] == variant_num), None)
     if not variant:
         logging.error(f"Invalid variant number: {variant_num}")
-        return
+        return []
 
     option_dir = BASE_DIR / f"option{variant_num}"
 
     vectors_path = option_dir / "knapsack_vectors.csv"
     problems_path = option_dir / "knapsack_problems.csv"
-    results_path = option_dir / "genetic_results.csv"
+    results_path = option_dir / results_filename()
 
     use_modulo = variant["modulo"]
 
@@ -257,16 +879,79 @@ def solve_for_variant(variant_num: int) -> None:
     solved_problems = load_existing_results(results_path)
     logging.info("Found %d already solved problems with GA for variant %d", len(solved_problems), variant_num)
 
-    solve_all_problems_parallel(problems, vectors, solved_problems, use_modulo, results_path)
+    if CHECKPOINT:
+        warn_without_checkpoints(variant_num, [p for p in problems if p[0] not in solved_problems], vectors)
+
+    return build_tasks(problems, vectors, solved_problems, use_modulo, results_path)
+
+
+def terminate_workers(signum, frame):
+    # Workers get SIGTERM from the pool, checkpoint their running GA and exit; results already sent are still stored
+    scheduler.terminate()
+    raise SystemExit(1)
+
+
+def export_results(variant_num: int) -> None:
+    store.export_csv(BASE_DIR / f"option{variant_num}" / results_filename(), RESULTS_HEADER)
+
+
+def solve_for_variant(variant_num: int) -> None:
+    check_engine_config()
+    scheduler.configure([(store.attach, (store.start(aggregator.consume_batch),)), (install_preemption_handler, ())])
+    signal.signal(signal.SIGTERM, terminate_workers)
+    try:
+        scheduler.run_tasks(collect_tasks(variant_num), time_limit=task_time_limit)
+    finally:
+        scheduler.shutdown()
+        store.stop()
+    export_results(variant_num)
     logging.info("Completed genetic algorithm solutions for variant %d", variant_num)
 
 
+def solve_variants(variant_nums: list) -> None:
+    # All variants share one pool so the longest GA runs of every variant start first
+    check_engine_config()
+    tasks = []
+    descriptors = {}
+    for variant_num in variant_nums:
+        variant_tasks = collect_tasks(variant_num)
+        # Grouped tasks (warm start, batches) already carry a whole vector group per task
+        if SHARED_MEMORY and variant_tasks and not (WARM_START or BATCH_MODE):
+            shared_tasks = share_tasks(variant_num, variant_tasks, descriptors)
+            logging.info(
+                "Variant %d task payloads: %d bytes pickled, %d bytes with shared memory",
+                variant_num,
+                scheduler.payload_bytes(variant_tasks),
+                scheduler.payload_bytes(shared_tasks),
+            )
+            variant_tasks = shared_tasks
+        tasks.extend(variant_tasks)
+
+    # Workers send results to a single writer process instead of appending to the CSV files themselves
+    scheduler.configure(
+        [
+            (shared.attach, (descriptors,)),
+            (store.attach, (store.start(aggregator.consume_batch),)),
+            (install_preemption_handler, ()),
+        ]
+    )
+    signal.signal(signal.SIGTERM, terminate_workers)
+    try:
+        scheduler.run_tasks(tasks, time_limit=task_time_limit)
+    finally:
+        scheduler.shutdown()
+        shared.release()
+        store.stop()
+    for variant_num in variant_nums:
+        export_results(variant_num)
+
+
 def main() -> None:
     if multiprocessing.get_start_method() != "spawn":
         multiprocessing.set_start_method("spawn", force=True)
 
-    for variant in range(8):
-        solve_for_variant(variant + 1)
+    solve_variants([variant["number"] for variant in VARIANTS])
+    logging.info("Completed genetic algorithm solutions for all variants")
 
 
 if __name__ == "__main__":
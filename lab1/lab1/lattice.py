@@ -0,0 +1,173 @@
+import csv
+import logging
+import math
+import random
+import time
+from pathlib import Path
+
+from bruteforce import brute_force_solve
+from generate import (
+    MAX_RATIO,
+    MIN_RATIO,
+    VARIANTS,
+    calculate_a_max,
+    generate_knapsack_problem,
+    generate_knapsack_vector,
+)
+from genetic import genetic_algorithm
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+BASE_DIR = Path("data")
+# Lovasz condition constant delta = 99/100, kept as a fraction to stay in exact integer arithmetic
+LLL_DELTA = (99, 100)
+# Reductions of randomly permuted bases tried before giving up on an instance
+LLL_ATTEMPTS = 5
+BENCHMARK_NS = [16, 24, 32, 48, 64, 96]
+BENCHMARK_PROBLEMS = 3
+BRUTE_FORCE_MAX_N = 20
+
+
+def dot(u: list, v: list) -> int:
+    return sum(x * y for x, y in zip(u, v))
+
+
+def lll_reduce(basis: list) -> list:
+    # Integral LLL (Cohen, Algorithm 2.6.7): Gram-Schmidt data is kept as exact integers d and lam
+    p, q = LLL_DELTA
+    b = [list(row) for row in basis]
+    n = len(b)
+    d = [1] + [0] * n
+    lam = [[0] * n for _ in range(n)]
+
+    def reduce(k: int, lower: int) -> None:
+        if 2 * abs(lam[k][lower]) > d[lower + 1]:
+            r = (2 * lam[k][lower] + d[lower + 1]) // (2 * d[lower + 1])
+            b[k] = [x - r * y for x, y in zip(b[k], b[lower])]
+            lam[k][lower] -= r * d[lower + 1]
+            for i in range(lower):
+                lam[k][i] -= r * lam[lower][i]
+
+    def swap(k: int, k_max: int) -> None:
+        b[k], b[k - 1] = b[k - 1], b[k]
+        for j in range(k - 1):
+            lam[k][j], lam[k - 1][j] = lam[k - 1][j], lam[k][j]
+        mu = lam[k][k - 1]
+        new_d = (d[k - 1] * d[k + 1] + mu * mu) // d[k]
+        for i in range(k + 1, k_max + 1):
+            t = lam[i][k]
+            lam[i][k] = (d[k + 1] * lam[i][k - 1] - mu * t) // d[k]
+            lam[i][k - 1] = (new_d * t + mu * lam[i][k]) // d[k + 1]
+        d[k] = new_d
+
+    d[1] = dot(b[0], b[0])
+    k, k_max = 1, 0
+    while k < n:
+        if k > k_max:
+            k_max = k
+            for j in range(k + 1):
+                u = dot(b[k], b[j])
+                for i in range(j):
+                    u = (d[i + 1] * u - lam[k][i] * lam[j][i]) // d[i]
+                if j < k:
+                    lam[k][j] = u
+                else:
+                    d[k + 1] = u
+
+        reduce(k, k - 1)
+        if q * d[k + 1] * d[k - 1] < p * d[k] ** 2 - q * lam[k][k - 1] ** 2:
+            swap(k, k_max)
+            k = max(1, k - 1)
+        else:
+            for lower in range(k - 2, -1, -1):
+                reduce(k, lower)
+            k += 1
+
+    return b
+
+
+def embedding_basis(vector: list, target: int, use_modulo: bool) -> list:
+    # CJLOSS embedding: a solution x maps to the short vector (2x - 1, -1, 0) with all entries +-1
+    n = len(vector)
+    weight = math.isqrt(n) + 1
+    basis = []
+    for i, v in enumerate(vector):
+        row = [0] * (n + 2)
+        row[i] = 2
+        row[n + 1] = weight * v
+        basis.append(row)
+    basis.append([1] * (n + 1) + [weight * target])
+    if use_modulo:
+        basis.append([0] * (n + 1) + [weight * (max(vector) + 1)])
+    return basis
+
+
+def extract_solution(reduced: list, vector: list, target: int, use_modulo: bool) -> int | None:
+    n = len(vector)
+    modulo = max(vector) + 1
+    for row in reduced:
+        if row[n + 1] != 0 or any(abs(x) != 1 for x in row[: n + 1]):
+            continue
+        signs = row[:n] if row[n] == -1 else [-x for x in row[:n]]
+        mask = sum(1 << i for i, s in enumerate(signs) if s == 1)
+        weight = sum(v for i, v in enumerate(vector) if mask & (1 << i))
+        if mask and (weight % modulo == target % modulo if use_modulo else weight == target):
+            return mask
+    return None
+
+
+def lattice_solve(vector: list, target: int, use_modulo: bool) -> tuple:
+    start_time = time.time()
+    basis = embedding_basis(vector, target, use_modulo)
+
+    for _ in range(LLL_ATTEMPTS):
+        mask = extract_solution(lll_reduce(basis), vector, target, use_modulo)
+        if mask is not None:
+            return time.time() - start_time, mask
+        random.shuffle(basis)
+
+    return time.time() - start_time, None
+
+
+def benchmark_instance(variant: dict, n: int, vector: list, target: int) -> list:
+    use_modulo = variant["modulo"]
+    rows = []
+
+    time_used, mask = lattice_solve(vector, target, use_modulo)
+    rows.append(("lattice", mask is not None, time_used))
+
+    if n <= BRUTE_FORCE_MAX_N:
+        first_time, _, solutions_count, _ = brute_force_solve(vector, target, use_modulo)
+        rows.append(("brute_force", solutions_count > 0, first_time))
+
+    time_used, min_fitness, _, _ = genetic_algorithm(vector, target, use_modulo)
+    rows.append(("genetic", min_fitness == 0, time_used))
+
+    return [(variant["number"], n, solver, "Да" if solved else "Нет", "%.6f" % t) for solver, solved, t in rows]
+
+
+def benchmark(ns: list, variants: list) -> None:
+    results_dir = BASE_DIR / "results"
+    results_dir.mkdir(exist_ok=True, parents=True)
+
+    with open(results_dir / "lattice_benchmark.csv", "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerow(["Вариант", "n", "Алгоритм", "Найдено точное решение", "Время работы алгоритма"])
+
+        for variant in variants:
+            for n in ns:
+                a_max = calculate_a_max(n, variant["divider"])
+                for _ in range(BENCHMARK_PROBLEMS):
+                    vector = generate_knapsack_vector(n, a_max)
+                    _, target, _ = generate_knapsack_problem(vector, MIN_RATIO, MAX_RATIO)
+                    writer.writerows(benchmark_instance(variant, n, vector, target))
+                    csvfile.flush()
+                logging.info("Benchmarked variant %d with n=%d", variant["number"], n)
+
+
+def main() -> None:
+    benchmark(BENCHMARK_NS, VARIANTS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import numpy as np
+
+# A number is stored as int64 limbs of LIMB_BITS bits each, least significant limb first. A 0/1 population times
+# limb weights then sums to below 2**63 per limb for any n < 2**31, and carries are propagated afterwards
+LIMB_BITS = 32
+LIMB_MASK = (1 << LIMB_BITS) - 1
+
+
+def limbs_needed(max_value: int) -> int:
+    return max(1, -(-max_value.bit_length() // LIMB_BITS))
+
+
+def to_limbs(values: list, width: int) -> np.ndarray:
+    return np.array([[(v >> (LIMB_BITS * i)) & LIMB_MASK for i in range(width)] for v in values], dtype=np.int64)
+
+
+def from_limbs(limbs: np.ndarray) -> list:
+    rows = limbs.reshape(-1, limbs.shape[-1]).tolist()
+    return [sum(limb << (LIMB_BITS * i) for i, limb in enumerate(row)) for row in rows]
+
+
+def to_float(limbs: np.ndarray) -> np.ndarray:
+    # Monotone in the exact value and exactly zero only for zero, which is all the GA selection needs
+    return limbs.astype(np.float64) @ (2.0 ** (LIMB_BITS * np.arange(limbs.shape[-1])))
+
+
+def normalize(limbs: np.ndarray) -> np.ndarray:
+    # Arithmetic shifts carry overflow up and borrow -1 for negative limbs; the top limb keeps the sign
+    for i in range(limbs.shape[-1] - 1):
+        carry = limbs[..., i] >> LIMB_BITS
+        limbs[..., i] &= LIMB_MASK
+        limbs[..., i + 1] += carry
+    return limbs
+
+
+def add(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return normalize(a + b)
+
+
+def sub(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return normalize(a - b)
+
+
+def compare(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # -1, 0 or 1 per number, decided by the most significant limb that differs
+    a, b = np.broadcast_arrays(a, b)
+    result = np.zeros(a.shape[:-1], dtype=np.int64)
+    for i in range(a.shape[-1] - 1, -1, -1):
+        result = np.where(result == 0, np.sign(a[..., i] - b[..., i]), result)
+    return result
+
+
+def absdiff(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a, b = np.broadcast_arrays(a, b)
+    swap = (compare(a, b) < 0)[..., None]
+    return sub(np.where(swap, b, a), np.where(swap, a, b))
+
+
+def dot(population: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    return normalize(population @ weights)
+
+
+def mod(limbs: np.ndarray, modulo: int, bound: int) -> np.ndarray:
+    # For values below bound, subtracting modulo << k wherever it fits, for k from high to low, leaves value % modulo
+    width = limbs.shape[-1]
+    for k in range((bound // modulo).bit_length() - 1, -1, -1):
+        shifted = to_limbs([modulo << k], width)[0]
+        fits = (compare(limbs, shifted) >= 0)[..., None]
+        limbs = np.where(fits, sub(limbs, shifted), limbs)
+    return limbs
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import shutil
+from pathlib import Path
+
+import aggregator
+import bruteforce
+import dataset
+import generate
+import genetic
+import limbs
+import report
+import scheduler
+import shared
+import store
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+BASE_DIR = Path("data")
+STATE_FILE = "pipeline_state.json"
+HASH_CHUNK_SIZE = 1 << 20
+# Stages listed here run even when their fingerprint is unchanged, e.g. ["report"]
+FORCE_STAGES = []
+
+GENETIC_PARAMS = [
+    "POPULATION_SIZE",
+    "MUTATION_RATE",
+    "CROSSOVER_RATE",
+    "TOURNAMENT_SIZE",
+    "MAX_GENERATIONS",
+    "MAX_TIME_SECONDS",
+    "ENGINE",
+    "PACKED_MAX_N",
+    "BATCH_MODE",
+    "WARM_START",
+    "WARM_START_ARCHIVE_SIZE",
+    "WARM_START_FRACTION",
+    "INITIALIZATION",
+    "GREEDY_SEED_FRACTION",
+    "REPAIR",
+]
+GENERATE_PARAMS = [
+    "N",
+    "VECTORS_COUNT",
+    "PROBLEMS_PER_VECTOR",
+    "MIN_RATIO",
+    "MAX_RATIO",
+    "SEED",
+    "CHUNK_ELEMENTS",
+    "WRITE_CSV",
+]
+
+
+def option_dir(variant_num: int) -> Path:
+    return BASE_DIR / f"option{variant_num}"
+
+
+def variant_by_number(variants: list, variant_num: int) -> dict:
+    return next(v for v in variants if v["number"] == variant_num)
+
+
+def module_params(module, names: list) -> dict:
+    return {name: getattr(module, name) for name in names}
+
+
+def hash_files(paths: list) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(str(path).encode())
+        if not path.exists():
+            digest.update(b"missing")
+            continue
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataset_files(variant_num: int) -> list:
+    directory = option_dir(variant_num)
+    csv_files = [directory / "knapsack_vectors.csv", directory / "knapsack_problems.csv"]
+    return csv_files + sorted(dataset.dataset_dir(directory).glob("*.npy"))
+
+
+def results_files() -> list:
+    return sorted(BASE_DIR.glob("option*/brute_force_results.csv")) + sorted(
+        BASE_DIR.glob("option*/genetic_results*.csv")
+    )
+
+
+def clear_brute_force(variant_num: int) -> None:
+    results_path = option_dir(variant_num) / bruteforce.RESULTS_FILE
+    store.clear(results_path)
+    shutil.rmtree(results_path.parent / bruteforce.SOLUTIONS_DIR_NAME, ignore_errors=True)
+
+
+def clear_genetic(variant_num: int) -> None:
+    results_path = option_dir(variant_num) / genetic.results_filename()
+    store.clear(results_path)
+    # Checkpoints of a changed GA would resume runs with the old code or parameters
+    shutil.rmtree(results_path.parent / genetic.CHECKPOINT_DIR_NAME / results_path.stem, ignore_errors=True)
+
+
+# Each stage has the modules whose code it depends on, its parameters, input and output files, and how to run
+# a list of stale variants (None for the one report over all variants). A stage reruns only if one of these changed
+STAGES = {
+    "generate": {
+        "modules": [generate, dataset],
+        "params": lambda v: dict(
+            module_params(generate, GENERATE_PARAMS), variant=variant_by_number(generate.VARIANTS, v)
+        ),
+        "inputs": lambda v: [],
+        "outputs": lambda v: dataset_files(v)[:2] if generate.WRITE_CSV else dataset_files(v)[2:],
+        "run": lambda vs: generate.generate_variants([variant_by_number(generate.VARIANTS, v) for v in vs]),
+        "clear": lambda v: None,
+        # Data generated before the pipeline existed is taken as up to date instead of being regenerated
+        "adopt_existing": True,
+        "per_variant": True,
+    },
+    "bruteforce": {
+        # Solvers read the dataset, run through the scheduler and write through the store, so those count too
+        "modules": [bruteforce, store, scheduler, shared, dataset],
+        "params": lambda v: dict(
+            SAVE_SOLUTIONS=bruteforce.SAVE_SOLUTIONS, variant=variant_by_number(bruteforce.VARIANTS, v)
+        ),
+        "inputs": dataset_files,
+        "outputs": lambda v: [option_dir(v) / bruteforce.RESULTS_FILE],
+        "run": bruteforce.solve_variants,
+        "clear": clear_brute_force,
+        "adopt_existing": False,
+        "per_variant": True,
+    },
+    "genetic": {
+        "modules": [genetic, limbs, store, scheduler, shared, dataset],
+        "params": lambda v: dict(
+            module_params(genetic, GENETIC_PARAMS), variant=variant_by_number(genetic.VARIANTS, v)
+        ),
+        "inputs": dataset_files,
+        "outputs": lambda v: [option_dir(v) / genetic.results_filename()],
+        "run": genetic.solve_variants,
+        "clear": clear_genetic,
+        "adopt_existing": False,
+        "per_variant": True,
+    },
+    "report": {
+        "modules": [report, aggregator],
+        "params": lambda v: {"POPULATION_SIZE": aggregator.POPULATION_SIZE, "QUANTILES": aggregator.QUANTILES},
+        "inputs": lambda v: (
+            results_files() + [path for variant in generate.VARIANTS for path in dataset_files(variant["number"])]
+        ),
+        "outputs": lambda v: [BASE_DIR / "results" / "summary_statistics.csv"],
+        "run": lambda vs: report.main(),
+        "clear": lambda v: None,
+        "adopt_existing": False,
+        "per_variant": False,
+    },
+}
+STAGE_ORDER = ["generate", "bruteforce", "genetic", "report"]
+
+
+def fingerprint(stage: str, variant_num: int | None) -> str:
+    spec = STAGES[stage]
+    payload = {
+        "code": hash_files([Path(module.__file__) for module in spec["modules"]]),
+        "params": spec["params"](variant_num),
+        "inputs": hash_files(spec["inputs"](variant_num)),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def load_state() -> dict:
+    path = BASE_DIR / STATE_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_state(state: dict) -> None:
+    BASE_DIR.mkdir(exist_ok=True, parents=True)
+    path = BASE_DIR / STATE_FILE
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    temporary_path.replace(path)
+
+
+def stage_key(stage: str, variant_num: int | None) -> str:
+    return f"{stage}:{'all' if variant_num is None else variant_num}"
+
+
+def plan_stage(stage: str, variant_nums: list, state: dict) -> list:
+    # Returns (variant, fingerprint) pairs to run; stale outputs are cleared first, interrupted runs keep theirs
+    spec = STAGES[stage]
+    to_run = []
+    for variant_num in variant_nums:
+        key = stage_key(stage, variant_num)
+        current = fingerprint(stage, variant_num)
+        outputs_exist = all(path.exists() for path in spec["outputs"](variant_num))
+        entry = state.get(key)
+
+        if entry is None and spec["adopt_existing"] and outputs_exist:
+            logging.info("Adopted existing outputs of %s", key)
+            state[key] = {"fingerprint": current, "complete": True}
+            continue
+        if entry and entry["fingerprint"] == current:
+            if entry["complete"] and outputs_exist and stage not in FORCE_STAGES:
+                logging.info("Stage %s is up to date", key)
+                continue
+            if not entry["complete"]:
+                logging.info("Resuming interrupted stage %s", key)
+        elif entry is not None:
+            logging.info("Stage %s is stale, clearing its outputs", key)
+            spec["clear"](variant_num)
+
+        state[key] = {"fingerprint": current, "complete": False}
+        to_run.append((variant_num, current))
+    return to_run
+
+
+def run_pipeline(variant_nums: list) -> None:
+    state = load_state()
+    for stage in STAGE_ORDER:
+        spec = STAGES[stage]
+        to_run = plan_stage(stage, variant_nums if spec["per_variant"] else [None], state)
+        save_state(state)
+        if not to_run:
+            continue
+
+        stale = [variant_num for variant_num, _ in to_run]
+        logging.info("Running stage %s for %s", stage, ", ".join(str(v) for v in stale if v is not None) or "all")
+        # Stale variants of one stage run together, so the solvers spread them over one shared pool
+        spec["run"](stale)
+
+        for variant_num, current in to_run:
+            state[stage_key(stage, variant_num)] = {"fingerprint": current, "complete": True}
+        save_state(state)
+
+
+def main() -> None:
+    if multiprocessing.get_start_method() != "spawn":
+        multiprocessing.set_start_method("spawn", force=True)
+
+    run_pipeline([variant["number"] for variant in generate.VARIANTS])
+    logging.info("Pipeline completed")
+
+
+if __name__ == "__main__":
+    main()
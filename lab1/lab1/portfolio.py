@@ -0,0 +1,142 @@
+import csv
+import logging
+import math
+import multiprocessing
+import queue
+import time
+from pathlib import Path
+
+from bruteforce import VARIANTS, brute_force_solve, load_problems, load_vectors
+from dispatch import estimate_costs, solve_with_engine
+from generate import calculate_a_max
+from genetic import genetic_algorithm
+from lattice import lattice_solve
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+BASE_DIR = Path("data")
+PORTFOLIO_ENGINES = ["genetic", "meet_in_the_middle", "dp", "lattice", "brute_force"]
+# Give up on a problem if no engine finds an exact solution in this time
+RACE_TIMEOUT_SECONDS = 300
+# Racers are short-lived, so they are forked: a spawned interpreter would cost more than most engines
+RACE_START_METHOD = "fork"
+# How often the race checks for racers that died without reporting
+RACE_POLL_SECONDS = 1.0
+
+
+def run_engine(engine: str, vector: list, target: int, use_modulo: bool, ratio: float, results: multiprocessing.Queue):
+    # Every racer reports (engine, mask), mask is None without an exact solution; the GA only reports its fitness,
+    # so its exact solutions have no mask
+    mask = None
+    exact = False
+    try:
+        if engine == "genetic":
+            _, min_fitness, _, _ = genetic_algorithm(vector, target, use_modulo, ratio)
+            exact = min_fitness == 0
+        elif engine == "lattice":
+            _, mask = lattice_solve(vector, target, use_modulo)
+        elif engine == "brute_force":
+            _, _, _, mask = brute_force_solve(vector, target, use_modulo, first_only=True)
+        else:
+            _, mask = solve_with_engine(engine, vector, target, use_modulo)
+    except Exception:
+        logging.exception("Engine %s failed", engine)
+    results.put((engine, exact or mask is not None, mask))
+
+
+def viable_engines(vector: list, use_modulo: bool, a_max: int, target: int) -> list:
+    costs = estimate_costs(len(vector), a_max, use_modulo, target)
+    return [engine for engine in PORTFOLIO_ENGINES if costs.get(engine, 0) != math.inf]
+
+
+def race(vector: list, target: int, ratio: float, use_modulo: bool, a_max: int) -> tuple:
+    context = multiprocessing.get_context(RACE_START_METHOD)
+    results = context.Queue()
+    start_time = time.time()
+    racers = [
+        context.Process(target=run_engine, args=(engine, vector, target, use_modulo, ratio, results), name=engine)
+        for engine in viable_engines(vector, use_modulo, a_max, target)
+    ]
+    for racer in racers:
+        racer.start()
+
+    winner = None
+    solution = None
+    pending = {racer.name: racer for racer in racers}
+    try:
+        while pending:
+            remaining = RACE_TIMEOUT_SECONDS - (time.time() - start_time)
+            if remaining <= 0:
+                break
+            try:
+                engine, exact, mask = results.get(timeout=min(remaining, RACE_POLL_SECONDS))
+            except queue.Empty:
+                # A racer killed by a signal or the OOM killer never reports, so the race stops waiting for it
+                pending = {name: racer for name, racer in pending.items() if racer.exitcode is None}
+                continue
+            pending.pop(engine, None)
+            if exact:
+                winner, solution = engine, mask
+                break
+    finally:
+        elapsed = time.time() - start_time
+        for racer in racers:
+            if racer.is_alive():
+                racer.terminate()
+            racer.join()
+
+    return winner, solution, elapsed
+
+
+def save_result_to_file(result: tuple, path: Path) -> None:
+    problem_idx, winner, solution, time_used = result
+    with open(path, "a", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerow([problem_idx, winner or "", "" if solution is None else solution, "%.6f" % time_used])
+
+
+def solve_single_problem(args: tuple) -> tuple:
+    problem_idx, vector_idx, target, ratio, vector, use_modulo, a_max, results_path = args
+    winner, solution, time_used = race(vector, target, ratio, use_modulo, a_max)
+
+    result = (problem_idx, winner, solution, time_used)
+    save_result_to_file(result, results_path)
+    logging.info("Solved problem %d with portfolio: winner=%s, time=%.4f seconds", problem_idx, winner, time_used)
+    return result
+
+
+def solve_for_variant(variant_num: int) -> None:
+    variant = next((v for v in VARIANTS if v["number"] == variant_num), None)
+    if not variant:
+        logging.error(f"Invalid variant number: {variant_num}")
+        return
+
+    option_dir = BASE_DIR / f"option{variant_num}"
+    results_path = option_dir / "portfolio_results.csv"
+    a_max = calculate_a_max(variant["n"], variant["divider"])
+
+    vectors = load_vectors(option_dir / "knapsack_vectors.csv")
+    problems = load_problems(option_dir / "knapsack_problems.csv")
+
+    with open(results_path, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerow(["Номер задачи", "Победивший алгоритм", "Маска решения", "Время нахождения точного решения"])
+
+    # Each race already occupies one process per engine, so problems are raced one after another
+    for problem_idx, vector_idx, target, ratio in problems:
+        solve_single_problem(
+            (problem_idx, vector_idx, target, ratio, vectors[vector_idx], variant["modulo"], a_max, results_path)
+        )
+    logging.info("Completed portfolio solutions for variant %d", variant_num)
+
+
+def main() -> None:
+    if multiprocessing.get_start_method() != "spawn":
+        multiprocessing.set_start_method("spawn", force=True)
+
+    for variant in VARIANTS:
+        solve_for_variant(variant["number"])
+
+
+if __name__ == "__main__":
+    main()
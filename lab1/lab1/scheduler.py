@@ -0,0 +1,141 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import signal
+import time
+from multiprocessing.pool import Pool
+from typing import Callable
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+NUM_PROCESSES = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+TASK_TIME_LIMIT_SECONDS = 900
+# Workers are replaced after this many tasks to release memory held by long runs
+MAX_TASKS_PER_CHILD = 50
+# Workers fork from a server that has already imported these, instead of re-importing numpy in every worker
+START_METHOD = "forkserver"
+PRELOAD_MODULES = ["numpy", "shared"]
+
+_pool = None
+_initializers = []
+
+
+class TaskTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise TaskTimeout()
+
+
+def _run_with_time_limit(payload: tuple):
+    solve_fn, args, time_limit = payload
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.alarm(time_limit)
+    try:
+        return solve_fn(args)
+    except TaskTimeout:
+        logging.warning("Task %s exceeded the %d seconds limit", solve_fn.__name__, time_limit)
+        return None
+    finally:
+        signal.alarm(0)
+
+
+def _initialize(initializers: list) -> None:
+    for initializer, initargs in initializers:
+        initializer(*initargs)
+
+
+def _ping(_: int) -> int:
+    return os.getpid()
+
+
+def configure(initializers: list) -> None:
+    # initializers are (function, args) pairs run in every new worker, e.g. attaching shared data or a results queue
+    global _initializers
+    shutdown()
+    _initializers = initializers
+
+
+def get_pool() -> Pool:
+    global _pool
+    if _pool is None:
+        start_time = time.time()
+        context = multiprocessing.get_context(START_METHOD)
+        if START_METHOD == "forkserver":
+            context.set_forkserver_preload(PRELOAD_MODULES)
+        _pool = context.Pool(
+            processes=NUM_PROCESSES,
+            initializer=_initialize,
+            initargs=(_initializers,),
+            maxtasksperchild=MAX_TASKS_PER_CHILD,
+        )
+        _pool.map(_ping, range(NUM_PROCESSES))
+        logging.info(
+            "Started %s scheduler pool with %d processes in %.4f seconds",
+            START_METHOD,
+            NUM_PROCESSES,
+            time.time() - start_time,
+        )
+    return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+
+def terminate() -> None:
+    # Sends SIGTERM to every worker instead of waiting for the queued tasks
+    global _pool
+    if _pool is not None:
+        _pool.terminate()
+        _pool = None
+
+
+def payload_bytes(tasks: list) -> int:
+    return sum(len(pickle.dumps(args)) for _, _, args in tasks)
+
+
+def task_time_limit(time_limit: int | Callable[[float], int], cost: float) -> int:
+    return time_limit(cost) if callable(time_limit) else time_limit
+
+
+def run_inline(tasks: list, time_limit: int | Callable[[float], int] = TASK_TIME_LIMIT_SECONDS) -> list:
+    # Same as run_tasks, but one task after another in this process, for tasks that spread over processes themselves
+    ordered = sorted(tasks, key=lambda task: task[0], reverse=True)
+    results = []
+    for cost, solve_fn, args in ordered:
+        result = _run_with_time_limit((solve_fn, args, task_time_limit(time_limit, cost)))
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def run_tasks(tasks: list, time_limit: int | Callable[[float], int] = TASK_TIME_LIMIT_SECONDS) -> list:
+    # tasks are (expected cost, solve function, args); the most expensive start first to avoid straggler tails.
+    # time_limit is one limit for every task, or a function of the task's cost for tasks of very different length
+    if not tasks:
+        return []
+
+    ordered = sorted(tasks, key=lambda task: task[0], reverse=True)
+    payloads = [(solve_fn, args, task_time_limit(time_limit, cost)) for cost, solve_fn, args in ordered]
+
+    start_time = time.time()
+    results = []
+    for result in get_pool().imap_unordered(_run_with_time_limit, payloads):
+        if result is not None:
+            results.append(result)
+
+    logging.info(
+        "Scheduler finished %d of %d tasks (%d bytes of task payloads) in %.4f seconds",
+        len(results),
+        len(tasks),
+        payload_bytes(tasks),
+        time.time() - start_time,
+    )
+    return results
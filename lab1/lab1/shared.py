@@ -0,0 +1,58 @@
+import logging
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Blocks created by this process, released by release()
+_owned = []
+# Arrays attached in a worker, keyed by variant number
+_datasets = {}
+
+
+def _share_array(array: np.ndarray) -> tuple:
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    _owned.append(block)
+    return block.name, array.shape, array.dtype.str
+
+
+def share_variant(vectors: dict, problems: list) -> dict:
+    # Vector rows follow the sorted vector indices; problems refer to their vector by row
+    vector_ids = sorted(vectors)
+    vector_rows = {vector_idx: row for row, vector_idx in enumerate(vector_ids)}
+    return {
+        "vectors": _share_array(np.array([vectors[i] for i in vector_ids], dtype=np.int64)),
+        "vector_ids": _share_array(np.array(vector_ids, dtype=np.int64)),
+        "problems": _share_array(np.array([(p[0], vector_rows[p[1]], p[2]) for p in problems], dtype=np.int64)),
+        "ratios": _share_array(np.array([p[3] for p in problems], dtype=np.float64)),
+    }
+
+
+def attach(descriptors: dict) -> None:
+    start_time = time.time()
+    for variant_num, arrays in descriptors.items():
+        dataset = {}
+        for name, (block_name, shape, dtype) in arrays.items():
+            # Workers share the parent's resource tracker, so attaching does not take ownership of the block
+            block = shared_memory.SharedMemory(name=block_name)
+            dataset[name] = (block, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+        _datasets[variant_num] = dataset
+    logging.debug("Worker attached %d shared datasets in %.6f seconds", len(descriptors), time.time() - start_time)
+
+
+def load_problem(variant_num: int, row: int) -> tuple:
+    dataset = _datasets[variant_num]
+    problem_idx, vector_row, target = dataset["problems"][1][row]
+    vector_idx = dataset["vector_ids"][1][vector_row]
+    vector = dataset["vectors"][1][vector_row].tolist()
+    return int(problem_idx), int(vector_idx), int(target), float(dataset["ratios"][1][row]), vector
+
+
+def release() -> None:
+    while _owned:
+        block = _owned.pop()
+        block.close()
+        block.unlink()
@@ -0,0 +1,271 @@
+import csv
+import logging
+import multiprocessing
+import queue
+import sqlite3
+import time
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Results of one option directory live in one database, one table per results file
+DB_NAME = "results.sqlite"
+# The writer commits after this many rows or after this many seconds, whichever comes first
+BATCH_SIZE = 200
+BATCH_SECONDS = 1.0
+START_METHOD = "forkserver"
+# Columns after problem_idx of each results table, by the stem prefix of its results file (genetic_results_warm is
+# a genetic_results table). min_fitness has no type affinity, so fitnesses beyond int64 are kept exactly as text
+TABLE_COLUMNS = {
+    "brute_force_results": ["first_solution_time REAL", "all_solutions_time REAL", "solutions_count INTEGER"],
+    "genetic_results": ["time_used REAL", "min_fitness", "stop_reason TEXT", "last_generation INTEGER"],
+}
+# Times are written to the CSV exports with the precision the solvers report them with
+FLOAT_FORMAT = "%.6f"
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+# Queue to the writer process; None means rows are written directly by this process
+_queue = None
+_writer = None
+
+
+def location(path: Path) -> tuple:
+    # A results path like option1/brute_force_results.csv maps to table brute_force_results of option1's database
+    return path.parent / DB_NAME, path.stem
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path, timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def table_columns(table: str) -> list:
+    for prefix, columns in TABLE_COLUMNS.items():
+        if table.startswith(prefix):
+            return columns
+    raise ValueError(f"No results columns for table {table}")
+
+
+def create_table(connection: sqlite3.Connection, table: str) -> None:
+    # problem_idx is the primary key, so resume queries read the index and a re-solved problem replaces its row
+    columns = ", ".join(["problem_idx INTEGER PRIMARY KEY"] + table_columns(table))
+    connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+
+
+def to_column(value):
+    # Rows imported from CSV hold integers as text, which the untyped min_fitness column would keep as text
+    if isinstance(value, str) and value.lstrip("-").isdigit():
+        value = int(value)
+    # SQLite integers are 64-bit; larger Python ints are stored as their decimal text
+    return str(value) if isinstance(value, int) and not INT64_MIN <= value <= INT64_MAX else value
+
+
+def insert_rows(connection: sqlite3.Connection, table: str, rows: list) -> None:
+    # A row is [problem_idx, *values] as written by the solvers; problem_idx comes from the message
+    placeholders = ", ".join("?" * (len(table_columns(table)) + 1))
+    connection.executemany(
+        f'INSERT OR REPLACE INTO "{table}" VALUES ({placeholders})',
+        [(problem_idx, *map(to_column, row[1:])) for problem_idx, row in rows],
+    )
+
+
+def write_rows(connection: sqlite3.Connection, table: str, rows: list) -> None:
+    with connection:
+        create_table(connection, table)
+        insert_rows(connection, table, rows)
+
+
+def write_batch(messages: list, connections: dict) -> None:
+    groups = {}
+    for path, problem_idx, row in messages:
+        groups.setdefault(location(Path(path)), []).append((problem_idx, row))
+
+    for (db_path, table), rows in groups.items():
+        if db_path not in connections:
+            connections[db_path] = connect(db_path)
+        write_rows(connections[db_path], table, rows)
+
+
+def notify(listener, messages: list | None) -> None:
+    # A failing listener must not stop the writer, or the results still in the queue would be lost
+    try:
+        listener(messages)
+    except Exception:
+        logging.exception("Results listener failed")
+
+
+def close_connections(connections: dict) -> None:
+    for connection in connections.values():
+        connection.close()
+    connections.clear()
+
+
+def run_writer(results_queue: multiprocessing.Queue, listener=None) -> None:
+    connections = {}
+    running = True
+    try:
+        while running:
+            messages = [results_queue.get()]
+            deadline = time.time() + BATCH_SECONDS
+            while len(messages) < BATCH_SIZE and deadline > time.time():
+                try:
+                    messages.append(results_queue.get(timeout=deadline - time.time()))
+                except queue.Empty:
+                    break
+
+            if None in messages:
+                running = False
+                messages = [message for message in messages if message is not None]
+            try:
+                write_batch(messages, connections)
+            except Exception:
+                # The batch is lost, but the writer keeps draining the queue with fresh connections, so later
+                # results are still stored and stop() does not wait on a dead writer
+                logging.exception("Failed to store a batch of %d results", len(messages))
+                close_connections(connections)
+                continue
+            if listener is not None and messages:
+                notify(listener, messages)
+
+        if listener is not None:
+            notify(listener, None)
+    finally:
+        close_connections(connections)
+
+
+def start(listener=None) -> multiprocessing.Queue:
+    # listener, a module-level function, is called in the writer process with every committed batch of
+    # (path, problem_idx, row) messages and with None once the writer stops
+    global _queue, _writer
+    context = multiprocessing.get_context(START_METHOD)
+    _queue = context.Queue()
+    _writer = context.Process(target=run_writer, args=(_queue, listener), daemon=True)
+    _writer.start()
+    return _queue
+
+
+def attach(results_queue: multiprocessing.Queue) -> None:
+    global _queue
+    _queue = results_queue
+
+
+def stop() -> None:
+    global _queue, _writer
+    if _writer is not None:
+        _queue.put(None)
+        _writer.join()
+    _queue = None
+    _writer = None
+
+
+def put(path: Path, problem_idx: int, row: list) -> None:
+    if _queue is not None:
+        _queue.put((str(path), problem_idx, row))
+        return
+
+    db_path, table = location(path)
+    connection = connect(db_path)
+    try:
+        write_rows(connection, table, [(problem_idx, row)])
+    finally:
+        connection.close()
+
+
+def has_table(connection: sqlite3.Connection, table: str) -> bool:
+    query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return connection.execute(query, (table,)).fetchone() is not None
+
+
+def solved_problems(path: Path) -> set:
+    db_path, table = location(path)
+    if not db_path.exists():
+        return set()
+
+    connection = connect(db_path)
+    try:
+        if not has_table(connection, table):
+            return set()
+        return {problem_idx for (problem_idx,) in connection.execute(f'SELECT problem_idx FROM "{table}"')}
+    finally:
+        connection.close()
+
+
+def import_csv(path: Path) -> int:
+    # Results written before the store existed are taken over once, so resuming does not re-solve them
+    with open(path, "r", newline="") as csvfile:
+        reader = csv.reader(csvfile, delimiter=",")
+        next(reader, None)
+        rows = [(int(row[0]), row) for row in reader if row]
+
+    db_path, table = location(path)
+    connection = connect(db_path)
+    try:
+        write_rows(connection, table, rows)
+    finally:
+        connection.close()
+    return len(rows)
+
+
+def load_results(path: Path, header: list) -> set:
+    # Resume helper for the solvers: imports a legacy CSV on first use and returns the solved problem numbers
+    solved = solved_problems(path)
+    if not solved and path.exists():
+        logging.info("Imported %d results from %s into the results store", import_csv(path), path)
+        solved = solved_problems(path)
+    elif not path.exists():
+        export_csv(path, header)
+    return solved
+
+
+def clear(path: Path) -> None:
+    # Drops the stored results of one results file, so the next run solves every problem again
+    db_path, table = location(path)
+    if db_path.exists():
+        connection = connect(db_path)
+        try:
+            with connection:
+                connection.execute(f'DROP TABLE IF EXISTS "{table}"')
+        finally:
+            connection.close()
+    path.unlink(missing_ok=True)
+
+
+def stored_paths(option_dir: Path) -> list:
+    # Results paths of all tables in option_dir's database, the inverse of location
+    db_path = option_dir / DB_NAME
+    if not db_path.exists():
+        return []
+
+    connection = connect(db_path)
+    try:
+        query = "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+        return [option_dir / f"{table}.csv" for (table,) in connection.execute(query)]
+    finally:
+        connection.close()
+
+
+def load_rows(path: Path) -> list:
+    db_path, table = location(path)
+    if not db_path.exists():
+        return []
+
+    connection = connect(db_path)
+    try:
+        if not has_table(connection, table):
+            return []
+        return [list(row) for row in connection.execute(f'SELECT * FROM "{table}" ORDER BY problem_idx')]
+    finally:
+        connection.close()
+
+
+def export_csv(path: Path, header: list) -> None:
+    rows = load_rows(path)
+    with open(path, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter=",")
+        writer.writerow(header)
+        writer.writerows(
+            [[FLOAT_FORMAT % value if isinstance(value, float) else value for value in row] for row in rows]
+        )
@@ -0,0 +1,178 @@
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bruteforce import VARIANTS, load_problems, load_vectors
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+BASE_DIR = Path("data")
+INDEX_DIR_NAME = "index"
+# Up to this n the whole 2^n sum table is stored, so a query is just two binary searches
+FULL_TABLE_MAX_N = 20
+
+_open_indexes = {}
+
+
+def subset_sums(items: list, modulo: int | None) -> tuple:
+    sums = np.zeros(1, dtype=np.int64)
+    for item in items:
+        shifted = sums + item
+        if modulo:
+            shifted %= modulo
+        sums = np.concatenate([sums, shifted])
+
+    # Position in the table is exactly the subset mask, so sort both together
+    masks = np.arange(len(sums), dtype=np.uint64)
+    order = np.argsort(sums, kind="stable")
+    return sums[order], masks[order]
+
+
+def build_tables(vector: list, use_modulo: bool) -> dict:
+    n = len(vector)
+    modulo = max(vector) + 1 if use_modulo else 0
+    split = n if n <= FULL_TABLE_MAX_N else n // 2
+
+    left_sums, left_masks = subset_sums(vector[:split], modulo)
+    right_sums, right_masks = subset_sums(vector[split:], modulo)
+    return {
+        "n": n,
+        "split": split,
+        "modulo": modulo,
+        "left_sums": left_sums,
+        "left_masks": left_masks,
+        "right_sums": right_sums,
+        "right_masks": right_masks,
+    }
+
+
+def _needed_left_sums(tables: dict, target: int) -> tuple:
+    modulo = tables["modulo"]
+    if modulo:
+        target = target % modulo
+        needed = (target - tables["right_sums"]) % modulo
+    else:
+        needed = target - tables["right_sums"]
+
+    lo = np.searchsorted(tables["left_sums"], needed, side="left")
+    hi = np.searchsorted(tables["left_sums"], needed, side="right")
+    return target, lo, hi
+
+
+def count_in_tables(tables: dict, target: int) -> int:
+    target, lo, hi = _needed_left_sums(tables, target)
+    count = int((hi - lo).sum())
+    # The empty subset always sums to zero but is never a solution, as in brute_force_solve
+    return count - 1 if target == 0 else count
+
+
+def enumerate_in_tables(tables: dict, target: int) -> np.ndarray:
+    _, lo, hi = _needed_left_sums(tables, target)
+    matched = np.nonzero(hi > lo)[0]
+    if len(matched) == 0:
+        return np.empty(0, dtype=np.uint64)
+
+    chunks = []
+    for right_pos in matched:
+        left_masks = tables["left_masks"][lo[right_pos] : hi[right_pos]]
+        right_mask = tables["right_masks"][right_pos] << np.uint64(tables["split"])
+        chunks.append(left_masks | right_mask)
+
+    masks = np.sort(np.concatenate(chunks))
+    return masks[masks != 0]
+
+
+class SubsetSumIndex:
+    def __init__(self, path: Path):
+        self.path = path
+        self._tables = None
+
+    @property
+    def tables(self) -> dict:
+        # Arrays are memory-mapped read-only, so pages are shared between worker processes via the page cache
+        if self._tables is None:
+            with open(self.path / "meta.json", "r") as f:
+                tables = json.load(f)
+            for name in ("left_sums", "left_masks", "right_sums", "right_masks"):
+                tables[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+            self._tables = tables
+        return self._tables
+
+    def count(self, target: int) -> int:
+        return count_in_tables(self.tables, target)
+
+    def enumerate(self, target: int) -> np.ndarray:
+        return enumerate_in_tables(self.tables, target)
+
+
+def index_path(variant_num: int, vector_idx: int) -> Path:
+    return BASE_DIR / f"option{variant_num}" / INDEX_DIR_NAME / f"vector_{vector_idx}"
+
+
+def save_index(tables: dict, path: Path) -> None:
+    path.mkdir(exist_ok=True, parents=True)
+    for name in ("left_sums", "left_masks", "right_sums", "right_masks"):
+        np.save(path / f"{name}.npy", tables[name])
+    with open(path / "meta.json", "w") as f:
+        json.dump({"n": tables["n"], "split": tables["split"], "modulo": tables["modulo"]}, f)
+
+
+def open_index(variant_num: int, vector_idx: int) -> SubsetSumIndex:
+    key = (variant_num, vector_idx)
+    if key not in _open_indexes:
+        _open_indexes[key] = SubsetSumIndex(index_path(variant_num, vector_idx))
+    return _open_indexes[key]
+
+
+def count_solutions(variant_num: int, vector_idx: int, target: int) -> int:
+    return open_index(variant_num, vector_idx).count(target)
+
+
+def enumerate_solutions(variant_num: int, vector_idx: int, target: int) -> np.ndarray:
+    return open_index(variant_num, vector_idx).enumerate(target)
+
+
+def build_index_for_variant(variant_num: int) -> None:
+    variant = next((v for v in VARIANTS if v["number"] == variant_num), None)
+    if not variant:
+        logging.error(f"Invalid variant number: {variant_num}")
+        return
+
+    vectors = load_vectors(BASE_DIR / f"option{variant_num}" / "knapsack_vectors.csv")
+    start_time = time.time()
+    for vector_idx, vector in vectors.items():
+        save_index(build_tables(vector, variant["modulo"]), index_path(variant_num, vector_idx))
+
+    logging.info(
+        "Built subset sum index for %d vectors of variant %d in %.4f seconds",
+        len(vectors),
+        variant_num,
+        time.time() - start_time,
+    )
+
+
+def query_variant(variant_num: int) -> None:
+    problems = load_problems(BASE_DIR / f"option{variant_num}" / "knapsack_problems.csv")
+    start_time = time.time()
+    total_solutions = sum(count_solutions(variant_num, p[1], p[2]) for p in problems)
+    elapsed = time.time() - start_time
+    logging.info(
+        "Variant %d: %d solutions over %d problems, %.1f us per query",
+        variant_num,
+        total_solutions,
+        len(problems),
+        elapsed / max(1, len(problems)) * 1e6,
+    )
+
+
+def main() -> None:
+    for variant in VARIANTS:
+        build_index_for_variant(variant["number"])
+        query_variant(variant["number"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The lab modules are scripts importing each other by plain name, as when run from lab1/lab1
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lab1"))
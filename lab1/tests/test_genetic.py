@@ -0,0 +1,51 @@
+import time
+
+import genetic
+import scheduler
+import store
+
+PROBLEM_SECONDS = 0.8
+
+
+def slow_genetic_algorithm(vector: list, target: int, use_modulo: bool, ratio=None, checkpoint=None) -> tuple:
+    time.sleep(PROBLEM_SECONDS)
+    return PROBLEM_SECONDS, 0, "test", 1
+
+
+def test_grouped_task_outlives_single_problem_limit(tmp_path, monkeypatch):
+    # The warm start group runs longer than one problem's limit, and than the old fixed task limit of
+    # 2 * MAX_TIME_SECONDS, yet every problem of the group must be stored
+    monkeypatch.setattr(genetic, "MAX_TIME_SECONDS", 1)
+    monkeypatch.setattr(genetic, "WARM_START", True)
+    monkeypatch.setattr(genetic, "CHECKPOINT", False)
+    monkeypatch.setattr(genetic, "genetic_algorithm", slow_genetic_algorithm)
+    monkeypatch.setattr(scheduler, "START_METHOD", "fork")
+    monkeypatch.setattr(scheduler, "NUM_PROCESSES", 1)
+
+    option_dir = tmp_path / "option1"
+    option_dir.mkdir()
+    results_path = option_dir / genetic.results_filename()
+    vectors = {0: [10**6 + i for i in range(8)]}
+    problems = [(problem_idx, 0, 3 * 10**6 + problem_idx, 0.5) for problem_idx in range(1, 4)]
+    assert PROBLEM_SECONDS * len(problems) > 2 * genetic.MAX_TIME_SECONDS
+
+    try:
+        genetic.solve_all_problems_parallel(problems, vectors, set(), False, results_path)
+    finally:
+        scheduler.shutdown()
+
+    assert store.solved_problems(results_path) == {1, 2, 3}
+
+
+def test_batch_mode_leaves_problems_beyond_int64_out_of_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(genetic, "BATCH_MODE", "vector")
+    vectors = {0: [1, 2, 3, 4], 1: [2**62, 2**62, 3]}
+    problems = [(1, 0, 5, 0.5), (2, 0, 6, 0.5), (3, 1, 2**62 + 3, 0.5), (4, 1, 3, 0.5)]
+
+    tasks = genetic.build_tasks(problems, vectors, set(), False, tmp_path / "genetic_results.csv")
+
+    batched = [p[0] for _, solve_fn, args in tasks if solve_fn is genetic.solve_problem_batch for p in args[0]]
+    single = [args[0] for _, solve_fn, args in tasks if solve_fn is genetic.solve_single_problem]
+    assert batched == [1, 2]
+    assert single == [3, 4]
+    assert genetic.select_engine(vectors[1], 3) == "limbs"
@@ -0,0 +1,43 @@
+import random
+
+import numpy as np
+import pytest
+
+import limbs
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_dot_matches_python_ints(seed):
+    rng = random.Random(seed)
+    vector = [rng.randrange(1, 2**100) for _ in range(12)]
+    population = np.array([[rng.randrange(2) for _ in vector] for _ in range(20)], dtype=np.int64)
+    width = limbs.limbs_needed(sum(vector))
+
+    totals = limbs.from_limbs(limbs.dot(population, limbs.to_limbs(vector, width)))
+
+    assert totals == [sum(v for v, bit in zip(vector, row) if bit) for row in population.tolist()]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_absdiff_matches_python_ints(seed):
+    rng = random.Random(seed)
+    a = [rng.randrange(2**90) for _ in range(30)] + [0, 2**90 - 1, 5]
+    b = [rng.randrange(2**90) for _ in range(30)] + [0, 0, 5]
+    width = limbs.limbs_needed(2**90)
+
+    result = limbs.from_limbs(limbs.absdiff(limbs.to_limbs(a, width), limbs.to_limbs(b, width)))
+
+    assert result == [abs(x - y) for x, y in zip(a, b)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mod_matches_python_ints(seed):
+    rng = random.Random(seed)
+    modulo = rng.randrange(2, 2**70)
+    bound = 2**96
+    values = [rng.randrange(bound) for _ in range(30)] + [0, modulo - 1, modulo, bound - 1]
+    width = limbs.limbs_needed(bound)
+
+    result = limbs.from_limbs(limbs.mod(limbs.to_limbs(values, width), modulo, bound))
+
+    assert result == [v % modulo for v in values]
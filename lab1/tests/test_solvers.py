@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+import subset_index
+from bruteforce import brute_force_solve
+from dp import dp_solve
+from subset_index import build_tables, count_in_tables, enumerate_in_tables
+
+
+def random_vector(seed: int, n: int = 10, a_max: int = 40) -> list:
+    rng = random.Random(seed)
+    return [rng.randint(1, a_max) for _ in range(n)]
+
+
+def is_solution(vector: list, mask: int, target: int, use_modulo: bool) -> bool:
+    total = sum(v for i, v in enumerate(vector) if mask >> i & 1)
+    if use_modulo:
+        modulo = max(vector) + 1
+        return total % modulo == target % modulo
+    return total == target
+
+
+def brute_force_masks(vector: list, target: int, use_modulo: bool) -> list:
+    return [mask for mask in range(1, 1 << len(vector)) if is_solution(vector, mask, target, use_modulo)]
+
+
+def targets(vector: list) -> list:
+    # Zero, a reachable sum, sums past the modulo and past the total, and an unreachable sum
+    return [0, vector[0] + vector[-1], max(vector) + 3, sum(vector) // 2, sum(vector), sum(vector) + 1]
+
+
+@pytest.mark.parametrize("use_modulo", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_dp_solve_matches_brute_force(seed, use_modulo):
+    vector = random_vector(seed)
+    for target in targets(vector):
+        _, _, expected, _ = brute_force_solve(vector, target, use_modulo)
+
+        count, mask = dp_solve(vector, target, use_modulo)
+
+        assert count == expected
+        assert (mask is None) == (expected == 0)
+        if mask is not None:
+            assert mask != 0 and is_solution(vector, mask, target, use_modulo)
+
+
+@pytest.mark.parametrize("full_table_max_n", [subset_index.FULL_TABLE_MAX_N, 4])
+@pytest.mark.parametrize("use_modulo", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_tables_match_brute_force(seed, use_modulo, full_table_max_n, monkeypatch):
+    # A small FULL_TABLE_MAX_N splits the vector into meet-in-the-middle halves
+    monkeypatch.setattr(subset_index, "FULL_TABLE_MAX_N", full_table_max_n)
+    vector = random_vector(seed)
+    tables = build_tables(vector, use_modulo)
+    for target in targets(vector):
+        _, _, expected, _ = brute_force_solve(vector, target, use_modulo)
+
+        assert count_in_tables(tables, target) == expected
+        assert enumerate_in_tables(tables, target).tolist() == brute_force_masks(vector, target, use_modulo)